@@ -0,0 +1 @@
+"""Financeiro Familiar: camada de dados (dados) e API HTTP (api), usadas pelo app Streamlit."""
@@ -0,0 +1,209 @@
+"""Linha de comando do Financeiro Familiar, para uso em cron e scripts.
+
+Exemplos:
+    python -m financeiro recorrencias
+    python -m financeiro reconstruir
+    python -m financeiro exportar transacoes.xlsx --usuario admin --inicio 2024-01-01
+    python -m financeiro importar extrato.csv --usuario maria
+    python -m financeiro criar-usuario joao --grupo familia --compartilhado
+    python -m financeiro dia-fatura 15
+    python -m financeiro carga --usuarios 20 --duracao 60
+    python -m financeiro relatorio 2023 2024 --saida relatorios/
+
+Usa o mesmo banco do app (DATABASE_URL) e não depende do Streamlit. Sai com
+código diferente de zero quando a operação falha.
+"""
+import argparse
+import getpass
+import sys
+from datetime import date
+
+def _dados():
+    # Importado só ao executar um comando: --help responde sem carregar o SQLAlchemy
+    from financeiro import dados
+    dados.inicializar()
+    return dados
+
+def _data(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError("use o formato AAAA-MM-DD")
+
+def _dia(valor):
+    dia = int(valor)
+    if not 1 <= dia <= 31:
+        raise argparse.ArgumentTypeError("o dia deve estar entre 1 e 31")
+    return dia
+
+def _falhar(mensagem):
+    print(mensagem, file=sys.stderr)
+    return 1
+
+def _id_usuario(dados, username):
+    """Id do usuário pelo username (None = todos os usuários)"""
+    if username is None:
+        return None
+    session = dados.get_session(leitura=True)
+    if session is None:
+        raise SystemExit(_falhar("Erro de conexão com o banco"))
+    try:
+        usuario = session.query(dados.Usuario).filter_by(username=username).first()
+    finally:
+        session.close()
+    if usuario is None:
+        raise SystemExit(_falhar(f"Usuário '{username}' não encontrado"))
+    return usuario.id
+
+def _usuario_ou_admin(dados, username):
+    """Id do usuário informado; sem --usuario, o ADM padrão (que vê todas as transações)"""
+    return _id_usuario(dados, username or 'admin')
+
+# ---------- Comandos ----------
+def cmd_recorrencias(args, dados):
+    from financeiro.recorrencia import processar_recorrencias_automaticas
+    geradas = processar_recorrencias_automaticas(_id_usuario(dados, args.usuario))
+    print(f"{geradas} transação(ões) recorrente(s) gerada(s)")
+    return 0
+
+def cmd_reconstruir(args, dados):
+    with dados.engine.begin() as conn:
+        dados.reconstruir_gastos_mensais(conn)
+    faturas = dados.reconstruir_faturas(somente_pendentes=False)
+    print(f"Gastos mensais recalculados; {faturas} compra(s) no cartão reagrupada(s) em faturas")
+    return 0
+
+def cmd_exportar(args, dados):
+    df = dados.carregar_transacoes(_usuario_ou_admin(dados, args.usuario), args.inicio, args.fim)
+    if df.empty:
+        return _falhar("Nenhuma transação no período")
+    if args.arquivo.lower().endswith('.xlsx'):
+        df.to_excel(args.arquivo, index=False)
+    else:
+        df.to_csv(args.arquivo, index=False)
+    print(f"{len(df)} transação(ões) exportada(s) para {args.arquivo}")
+    return 0
+
+def cmd_importar(args, dados):
+    usuario_id = _id_usuario(dados, args.usuario)
+    try:
+        extrato = dados.ler_extrato(args.arquivo)
+    except (OSError, ValueError) as e:
+        return _falhar(f"Erro ao ler extrato: {e}")
+
+    extrato = dados.preparar_extrato(extrato, usuario_id)
+    if not args.incluir_duplicadas:
+        ignoradas = int((~extrato['importar']).sum())
+        extrato = extrato[extrato['importar']]
+        if ignoradas:
+            print(f"{ignoradas} linha(s) já registrada(s) ignorada(s)")
+    if extrato.empty:
+        print("Nada a importar")
+        return 0
+
+    sucesso, mensagem = dados.importar_transacoes(extrato.drop(columns='importar'), usuario_id)
+    if not sucesso:
+        return _falhar(mensagem)
+    print(mensagem)
+    return 0
+
+def cmd_criar_usuario(args, dados):
+    senha = args.senha or getpass.getpass("Senha: ")
+    sucesso, mensagem, _ = dados.auth.criar_usuario(
+        args.username, senha, tipo=args.tipo, nome=args.nome, email=args.email,
+        grupo=args.grupo, compartilhado=1 if args.compartilhado else 0
+    )
+    if not sucesso:
+        return _falhar(mensagem)
+    print(mensagem)
+    return 0
+
+def cmd_dia_fatura(args, dados):
+    sucesso, mensagem = dados.save_config({"dia_fatura": args.dia})
+    if not sucesso:
+        return _falhar(mensagem)
+    print(f"Configuração salva: Fatura dia {args.dia}")
+    return 0
+
+def cmd_carga(args, dados):
+    from financeiro import carga
+    relatorio = carga.executar_carga(args.usuarios, args.duracao, args.pausa, args.por_familia,
+                                     args.historico, args.url_streamlit)
+    carga.imprimir_relatorio(relatorio)
+    return 0
+
+def cmd_relatorio(args, dados):
+    from financeiro import relatorio
+    arquivos = relatorio.gerar_relatorios(args.anos, args.grupo, args.saida, args.processos)
+    if not arquivos:
+        return _falhar("Nenhum grupo para o relatório")
+    for arquivo in arquivos:
+        print(arquivo)
+    return 0
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='python -m financeiro', description="Operações do Financeiro Familiar")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    p = comandos.add_parser('recorrencias', help="gera as transações recorrentes pendentes")
+    p.add_argument('--usuario', help="username (padrão: todos)")
+    p.set_defaults(funcao=cmd_recorrencias)
+
+    p = comandos.add_parser('reconstruir', help="recalcula gastos mensais e faturas a partir das transações")
+    p.set_defaults(funcao=cmd_reconstruir)
+
+    p = comandos.add_parser('exportar', help="exporta transações para CSV ou XLSX")
+    p.add_argument('arquivo')
+    p.add_argument('--usuario', help="username cujo escopo é exportado (padrão: admin)")
+    p.add_argument('--inicio', type=_data, help="data de pagamento inicial (AAAA-MM-DD)")
+    p.add_argument('--fim', type=_data, help="data de pagamento final (AAAA-MM-DD)")
+    p.set_defaults(funcao=cmd_exportar)
+
+    p = comandos.add_parser('importar', help="importa um extrato CSV/XLSX")
+    p.add_argument('arquivo')
+    p.add_argument('--usuario', required=True, help="username dono das transações")
+    p.add_argument('--incluir-duplicadas', action='store_true', help="grava também as linhas já registradas")
+    p.set_defaults(funcao=cmd_importar)
+
+    p = comandos.add_parser('criar-usuario', help="cria um usuário")
+    p.add_argument('username')
+    p.add_argument('--senha', help="senha (se omitida, é pedida no terminal)")
+    p.add_argument('--tipo', choices=['COMUM', 'ADM'], default='COMUM')
+    p.add_argument('--nome')
+    p.add_argument('--email')
+    p.add_argument('--grupo', default='padrao')
+    p.add_argument('--compartilhado', action='store_true', help="participa da base compartilhada do grupo")
+    p.set_defaults(funcao=cmd_criar_usuario)
+
+    p = comandos.add_parser('dia-fatura', help="altera o dia de vencimento padrão da fatura")
+    p.add_argument('dia', type=_dia)
+    p.set_defaults(funcao=cmd_dia_fatura)
+
+    p = comandos.add_parser('carga', help="teste de carga com usuários simultâneos (use um banco descartável)")
+    p.add_argument('--usuarios', type=int, default=10, help="usuários virtuais simultâneos (padrão: 10)")
+    p.add_argument('--duracao', type=float, default=60, help="segundos de teste (padrão: 60)")
+    p.add_argument('--pausa', type=float, default=1.0, help="pausa média entre ações de um usuário, em segundos")
+    p.add_argument('--por-familia', type=int, default=2, help="usuários por grupo compartilhado (padrão: 2)")
+    p.add_argument('--historico', type=int, default=200, help="transações criadas para cada usuário novo")
+    p.add_argument('--url-streamlit', help="também consulta o servidor Streamlit (ex.: http://localhost:8501)")
+    p.set_defaults(funcao=cmd_carga)
+
+    p = comandos.add_parser('relatorio', help="relatório anual (XLSX e HTML) de cada grupo")
+    p.add_argument('anos', type=int, nargs='+', metavar='ANO')
+    p.add_argument('--grupo', action='append', help="grupo a incluir (repetível; padrão: todos)")
+    p.add_argument('--saida', default='.', help="pasta dos arquivos gerados (padrão: atual)")
+    p.add_argument('--processos', type=int, help="processos de agregação (padrão: PROCESSOS_RELATORIO)")
+    p.set_defaults(funcao=cmd_relatorio)
+    return parser
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    dados = _dados()
+    with dados.coletar_erros() as erros:
+        codigo = args.funcao(args, dados)
+    for erro in erros:
+        print(erro, file=sys.stderr)
+    return codigo or (1 if erros else 0)
+
+if __name__ == '__main__':
+    sys.exit(main())
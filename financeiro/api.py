@@ -0,0 +1,239 @@
+"""API REST/JSON do Financeiro Familiar (ASGI, Starlette).
+
+Execute com:  uvicorn financeiro.api:app --host 0.0.0.0 --port 8000
+
+Autenticação pelo cabeçalho "Authorization: Bearer <token>", com tokens
+criados em Minha Conta. Cada requisição vê o mesmo escopo que o usuário
+tem no app (ADM vê tudo; base compartilhada vê o grupo).
+"""
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import date
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from financeiro import dados, recorrencia
+
+VALIDADE_CACHE_TOKEN_S = 60   # token revogado deixa de valer em até 1 minuto
+LIMITE_CACHE_TOKENS = 1000
+MAXIMO_POR_PAGINA = 200
+
+_tokens = {}
+_trava_tokens = threading.Lock()
+
+class ErroApi(Exception):
+    """Erro devolvido ao cliente com o status HTTP indicado"""
+    def __init__(self, status, mensagem, **dados_extras):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+        self.dados_extras = dados_extras
+
+async def _executar(funcao, *args, **kwargs):
+    """Roda a função síncrona do núcleo no pool de threads; retorna (resultado, erros avisados)"""
+    def chamada():
+        with dados.coletar_erros() as erros:
+            return funcao(*args, **kwargs), list(erros)
+    return await run_in_threadpool(chamada)
+
+async def _usuario(request):
+    """Usuário dono do token da requisição (com cache curto para não ir ao banco a cada chamada)"""
+    tipo, _, token = request.headers.get('authorization', '').partition(' ')
+    if tipo.lower() != 'bearer' or not token:
+        raise ErroApi(401, "Informe o cabeçalho Authorization: Bearer <token>")
+
+    agora = time.monotonic()
+    with _trava_tokens:
+        entrada = _tokens.get(token)
+    if entrada and entrada[1] > agora:
+        return entrada[0]
+
+    usuario, _ = await _executar(dados.auth.usuario_do_token, token)
+    if usuario is None:
+        raise ErroApi(401, "Token inválido ou revogado")
+    with _trava_tokens:
+        if len(_tokens) >= LIMITE_CACHE_TOKENS:
+            _tokens.clear()
+        _tokens[token] = (usuario, agora + VALIDADE_CACHE_TOKEN_S)
+    return usuario
+
+def _data(valor, campo, padrao=None):
+    if valor in (None, ''):
+        return padrao
+    try:
+        return date.fromisoformat(str(valor)[:10])
+    except ValueError:
+        raise ErroApi(400, f"{campo}: use o formato AAAA-MM-DD")
+
+def _inteiro(valor, campo, padrao, minimo=1, maximo=None):
+    if valor in (None, ''):
+        return padrao
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        raise ErroApi(400, f"{campo} deve ser um número inteiro")
+    if numero < minimo or (maximo is not None and numero > maximo):
+        raise ErroApi(400, f"{campo} deve estar entre {minimo} e {maximo}" if maximo else f"{campo} deve ser ao menos {minimo}")
+    return numero
+
+def _serializar(valor):
+    """Datas em ISO 8601 para o JSON"""
+    if isinstance(valor, dict):
+        return {chave: _serializar(v) for chave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_serializar(v) for v in valor]
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+def _resposta(conteudo, status=200):
+    return JSONResponse(_serializar(conteudo), status_code=status)
+
+def endpoint(funcao):
+    """Converte ErroApi e falhas inesperadas em respostas JSON"""
+    async def tratar(request):
+        try:
+            return await funcao(request)
+        except ErroApi as e:
+            return _resposta({'erro': e.mensagem, **e.dados_extras}, e.status)
+        except Exception as e:
+            dados.registrar_log(logging.ERROR, "Erro na API", caminho=request.url.path, erro=str(e))
+            return _resposta({'erro': "Erro interno"}, 500)
+    return tratar
+
+# ---------- Rotas ----------
+@endpoint
+async def saude(request):
+    return _resposta({'status': 'ok', 'banco': dados.engine.dialect.name if dados.engine is not None else None})
+
+@endpoint
+async def listar(request):
+    usuario = await _usuario(request)
+    parametros = request.query_params
+    pagina = _inteiro(parametros.get('pagina'), 'pagina', 1)
+    por_pagina = _inteiro(parametros.get('por_pagina'), 'por_pagina', 50, maximo=MAXIMO_POR_PAGINA)
+
+    (linhas, total), erros = await _executar(
+        dados.listar_transacoes, usuario['id'],
+        data_inicio=_data(parametros.get('data_inicio'), 'data_inicio'),
+        data_fim=_data(parametros.get('data_fim'), 'data_fim'),
+        tipo=parametros.get('tipo'),
+        categoria=parametros.get('categoria'),
+        forma=parametros.get('forma'),
+        busca=parametros.get('busca'),
+        pagina=pagina,
+        por_pagina=por_pagina
+    )
+    if erros:
+        raise ErroApi(500, erros[0])
+    return _resposta({'transacoes': linhas, 'total': total, 'pagina': pagina, 'por_pagina': por_pagina})
+
+@endpoint
+async def inserir(request):
+    usuario = await _usuario(request)
+    try:
+        corpo = await request.json()
+    except ValueError:
+        raise ErroApi(400, "Corpo JSON inválido")
+    if not isinstance(corpo, dict):
+        raise ErroApi(400, "Envie um objeto JSON")
+
+    tipo = corpo.get('tipo', 'Despesa')
+    if tipo not in ('Receita', 'Despesa'):
+        raise ErroApi(400, "tipo deve ser Receita ou Despesa")
+    try:
+        valor = float(corpo.get('valor'))
+    except (TypeError, ValueError):
+        raise ErroApi(400, "valor deve ser numérico")
+    descricao = str(corpo.get('descricao') or '').strip()
+    categoria = str(corpo.get('categoria') or '').strip()
+    forma = str(corpo.get('forma_pagamento') or '').strip()
+    hoje = date.today()
+    data_registro = _data(corpo.get('data_registro'), 'data_registro', hoje)
+
+    if not categoria or not forma:
+        # Campos omitidos são sugeridos pelo histórico, como no app
+        sugestao, _ = await _executar(dados.sugerir_categoria, descricao, usuario['id'])
+        categoria = categoria or sugestao['categoria'] or 'Outros'
+        forma = forma or sugestao['forma'] or 'Pix'
+
+    erros = dados.validar_transacao(data_registro, hoje, descricao, valor, categoria)
+    if erros:
+        raise ErroApi(400, "; ".join(erros))
+
+    no_cartao = "cred" in forma.lower() or "cart" in forma.lower()
+    cartao_id = corpo.get('cartao_id')
+    if cartao_id is not None:
+        # Só os cartões do dono do token: a compra entra na fatura do cartão informado
+        cartoes, _ = await _executar(dados.listar_cartoes, usuario['id'], incluir_inativos=True)
+        if cartao_id not in {cartao['id'] for cartao in cartoes}:
+            raise ErroApi(404, "Cartão não encontrado")
+    if no_cartao and corpo.get('data_compra'):
+        data_pagamento, _ = await _executar(
+            dados.calcular_pagamento_cartao, _data(corpo['data_compra'], 'data_compra'), cartao_id, usuario['id']
+        )
+    else:
+        data_pagamento = _data(corpo.get('data_pagamento'), 'data_pagamento', hoje)
+
+    impressao = dados.impressao_transacao(usuario['id'], data_pagamento, valor, descricao, forma)
+    duplicadas, _ = await _executar(dados.transacoes_duplicadas, [impressao])
+    if duplicadas and not corpo.get('permitir_duplicada'):
+        raise ErroApi(409, "Registro possivelmente duplicado; envie permitir_duplicada=true para gravar mesmo assim",
+                      existentes=[d['id'] for d in duplicadas[impressao]])
+
+    extra_fields = {"no_cartao": 1 if no_cartao else 0, "cartao_id": cartao_id}
+    if corpo.get('recorrente'):
+        extra_fields.update({"recorrente": 1, "dia_fixo": data_pagamento.day})
+
+    sucesso, erros = await _executar(
+        dados.inserir_transacao, tipo, data_registro, data_pagamento, descricao, valor, categoria, forma,
+        extra_fields, usuario['id']
+    )
+    if not sucesso:
+        raise ErroApi(500, erros[0] if erros else "Erro ao inserir transação")
+    return _resposta({'ok': True, 'tipo': tipo, 'descricao': descricao, 'valor': round(valor, 2),
+                      'categoria': categoria, 'forma_pagamento': forma, 'data_pagamento': data_pagamento}, 201)
+
+@endpoint
+async def resumo(request):
+    usuario = await _usuario(request)
+    mes = request.query_params.get('mes') or date.today().strftime('%Y-%m')
+    try:
+        ano, numero_mes = (int(parte) for parte in mes.split('-'))
+        date(ano, numero_mes, 1)
+    except ValueError:
+        raise ErroApi(400, "mes: use o formato AAAA-MM")
+
+    conteudo, erros = await _executar(dados.resumo_mensal, usuario['id'], ano, numero_mes)
+    if erros:
+        raise ErroApi(500, erros[0])
+    return _resposta(conteudo)
+
+@endpoint
+async def processar_recorrencias(request):
+    usuario = await _usuario(request)
+    # ADM processa as recorrências de todos; os demais, só as próprias
+    alvo = None if usuario['tipo'] == 'ADM' else usuario['id']
+    geradas, erros = await _executar(recorrencia.processar_recorrencias_automaticas, alvo)
+    if erros:
+        raise ErroApi(500, erros[0], geradas=geradas)
+    return _resposta({'geradas': geradas})
+
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    # Banco, tabelas e admin padrão são preparados ao subir o servidor, não ao importar o módulo
+    await run_in_threadpool(dados.inicializar)
+    yield
+
+app = Starlette(lifespan=ciclo_de_vida, routes=[
+    Route('/api/saude', saude, methods=['GET']),
+    Route('/api/transacoes', listar, methods=['GET']),
+    Route('/api/transacoes', inserir, methods=['POST']),
+    Route('/api/resumo', resumo, methods=['GET']),
+    Route('/api/recorrencias/processar', processar_recorrencias, methods=['POST']),
+])
@@ -0,0 +1,53 @@
+"""Consultas concorrentes com asyncio.
+
+A camada de dados é síncrona (SQLAlchemy ORM); aqui as funções dela rodam
+em um pool de threads do tamanho do pool de conexões e são reunidas com
+asyncio.gather, de modo que uma página espera pela consulta mais lenta e
+não pela soma de todas. Cada consulta herda o contexto de quem chamou
+(spans do rerun e leitura no primário logo após uma escrita).
+
+Na interface (síncrona):
+    r = reunir_consultas(transacoes=lambda: carregar_transacoes(uid),
+                         orcamentos=lambda: situacao_orcamentos(uid))
+
+Em código assíncrono (API):
+    resultados, erros = await reunir({'resumo': ..., 'faturas': ...})
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from financeiro import dados
+
+# Igual ao pool_size do engine: mais threads só ficariam esperando conexão
+LIMITE_CONSULTAS_SIMULTANEAS = 5
+
+@functools.lru_cache(maxsize=None)
+def _executor():
+    """Pool de threads das consultas, compartilhado pelo processo"""
+    return ThreadPoolExecutor(max_workers=LIMITE_CONSULTAS_SIMULTANEAS, thread_name_prefix='consulta')
+
+async def executar(funcao, *args, contexto=None, **kwargs):
+    """Roda uma função síncrona da camada de dados no pool; retorna (resultado, erros avisados)"""
+    contexto = contexto or dados.contexto_da_thread()
+
+    def chamada():
+        with dados.em_contexto(contexto) as erros:
+            return funcao(*args, **kwargs), list(erros)
+
+    return await asyncio.get_running_loop().run_in_executor(_executor(), chamada)
+
+async def reunir(consultas):
+    """Executa ao mesmo tempo {nome: função sem argumentos}; retorna ({nome: resultado}, erros avisados)"""
+    contexto = dados.contexto_da_thread()
+    with dados.medir('reunir_consultas', consultas=len(consultas)):
+        resultados = await asyncio.gather(*(executar(funcao, contexto=contexto) for funcao in consultas.values()))
+    erros = [erro for _, avisados in resultados for erro in avisados]
+    return dict(zip(consultas, (resultado for resultado, _ in resultados))), erros
+
+def reunir_consultas(**consultas):
+    """Versão síncrona de reunir(): devolve {nome: resultado} e avisa os erros na thread de quem chamou"""
+    resultados, erros = asyncio.run(reunir(consultas))
+    for erro in erros:
+        dados.avisar_erro(erro)
+    return resultados
@@ -0,0 +1,532 @@
+"""Autenticação e usuários do Financeiro Familiar (senhas, tokens da API, grupos).
+
+Criar um SistemaAutenticacao não acessa o banco; o admin padrão é garantido
+por dados.inicializar().
+"""
+import hashlib
+import logging
+import re
+import secrets
+from datetime import datetime
+
+from sqlalchemy import insert, update
+
+from financeiro.dados import (
+    NIVEL_INICIALIZACAO, registrar_log, get_session, _obter_grupo, marcar_dados_alterados,
+    agendar_movimentacao_historico
+)
+from financeiro.modelos import Usuario, LogAcesso, TokenApi
+
+class SistemaAutenticacao:
+    def criar_admin_padrao(self):
+        """Cria usuário administrador padrão se não existir"""
+        session = get_session()
+        if session is None:
+            registrar_log(logging.ERROR, "Não foi possível obter sessão do banco")
+            return
+        
+        try:
+            # Verificar se admin já existe
+            admin = session.query(Usuario).filter_by(username='admin').first()
+            
+            if not admin:
+                # Senha padrão: admin123
+                senha_hash = self._hash_senha("admin123")
+                
+                novo_admin = Usuario(
+                    username='admin',
+                    senha_hash=senha_hash,
+                    tipo='ADM',
+                    nome='Administrador',
+                    email='admin@financeiro.com',
+                    grupo='admin',
+                    grupo_id=_obter_grupo(session, 'admin').id,
+                    compartilhado=1,
+                    pode_compartilhar=1
+                )
+                
+                session.add(novo_admin)
+                session.commit()
+                registrar_log(logging.INFO, "Usuário administrador padrão criado", username="admin")
+            else:
+                # Verificar se o admin tem senha atualizada
+                senha_padrao_hash = self._hash_senha("admin123")
+                if admin.senha_hash == senha_padrao_hash:
+                    registrar_log(NIVEL_INICIALIZACAO, "Usuário admin ainda está com a senha padrão")
+        
+        except Exception as e:
+            registrar_log(logging.ERROR, "Erro ao criar admin padrão", erro=str(e))
+            session.rollback()
+        finally:
+            session.close()
+    
+    def _hash_senha(self, senha):
+        """Gera hash da senha usando SHA-256 com salt"""
+        salt = "financeiro_familiar_2025"
+        return hashlib.sha256((senha + salt).encode()).hexdigest()
+    
+    def validar_senha(self, senha):
+        """Valida força da senha"""
+        if len(senha) < 8:
+            return False, "A senha deve ter pelo menos 8 caracteres"
+        
+        if not re.search(r"[A-Z]", senha):
+            return False, "A senha deve conter pelo menos uma letra maiúscula"
+        
+        if not re.search(r"[a-z]", senha):
+            return False, "A senha deve conter pelo menos uma letra minúscula"
+        
+        if not re.search(r"\d", senha):
+            return False, "A senha deve conter pelo menos um número"
+        
+        return True, "Senha válida"
+    
+    def autenticar(self, username, senha):
+        """Autentica usuário e retorna dados se válido"""
+        session = get_session()
+        if session is None:
+            return False, None, "Erro de conexão com o banco"
+        
+        try:
+            # Buscar usuário
+            usuario = session.query(Usuario).filter(
+                Usuario.username == username,
+                Usuario.ativo == True
+            ).first()
+            
+            if not usuario:
+                return False, None, "Usuário não encontrado ou inativo"
+            
+            # Verificar senha
+            senha_hash = self._hash_senha(senha)
+            if usuario.senha_hash != senha_hash:
+                return False, None, "Senha incorreta"
+            
+            # Atualizar data do último login
+            usuario.data_ultimo_login = datetime.utcnow()
+            
+            # Log de acesso
+            log = LogAcesso(
+                usuario_id=usuario.id,
+                acao='LOGIN',
+                descricao='Login realizado com sucesso'
+            )
+            session.add(log)
+            
+            session.commit()
+            
+            # Dados do usuário
+            user_data = {
+                'id': usuario.id,
+                'username': usuario.username,
+                'tipo': usuario.tipo,
+                'nome': usuario.nome,
+                'grupo': usuario.grupo or 'padrao',
+                'compartilhado': usuario.compartilhado or 0
+            }
+            
+            return True, user_data, "Login realizado com sucesso"
+            
+        except Exception as e:
+            return False, None, f"Erro na autenticação: {str(e)}"
+        finally:
+            session.close()
+    
+    def alterar_senha(self, username, senha_atual, nova_senha):
+        """Altera a senha do usuário"""
+        session = get_session()
+        if session is None:
+            return False, "Erro de conexão com o banco"
+        
+        try:
+            # Verificar senha atual
+            usuario = session.query(Usuario).filter_by(username=username).first()
+            
+            if not usuario:
+                return False, "Usuário não encontrado"
+            
+            senha_hash_atual = self._hash_senha(senha_atual)
+            if usuario.senha_hash != senha_hash_atual:
+                return False, "Senha atual incorreta"
+            
+            # Validar nova senha
+            valido, mensagem = self.validar_senha(nova_senha)
+            if not valido:
+                return False, mensagem
+            
+            # Atualizar senha
+            nova_senha_hash = self._hash_senha(nova_senha)
+            usuario.senha_hash = nova_senha_hash
+            
+            # Log
+            log = LogAcesso(
+                usuario_id=usuario.id,
+                acao='ALTERACAO_SENHA',
+                descricao='Senha alterada com sucesso'
+            )
+            session.add(log)
+            
+            session.commit()
+            return True, "Senha alterada com sucesso"
+            
+        except Exception as e:
+            session.rollback()
+            return False, f"Erro ao alterar senha: {str(e)}"
+        finally:
+            session.close()
+    
+    def listar_usuarios(self):
+        """Lista todos os usuários"""
+        session = get_session()
+        if session is None:
+            return [], []
+        
+        try:
+            usuarios = session.query(Usuario).order_by(
+                Usuario.tipo.desc(),
+                Usuario.username
+            ).all()
+            
+            # Converter para lista de dicionários
+            usuarios_list = []
+            for usuario in usuarios:
+                usuarios_list.append({
+                    'id': usuario.id,
+                    'username': usuario.username,
+                    'tipo': usuario.tipo,
+                    'nome': usuario.nome,
+                    'email': usuario.email,
+                    'ativo': usuario.ativo,
+                    'grupo': usuario.grupo,
+                    'compartilhado': usuario.compartilhado,
+                    'data_criacao': usuario.data_criacao,
+                    'data_ultimo_login': usuario.data_ultimo_login
+                })
+            
+            return usuarios_list, list(usuarios_list[0].keys()) if usuarios_list else []
+        except Exception as e:
+            registrar_log(logging.ERROR, "Erro ao listar usuários", erro=str(e))
+            return [], []
+        finally:
+            session.close()
+    
+    def alterar_status_usuario(self, usuario_id, ativo):
+        """Ativa/desativa um usuário"""
+        session = get_session()
+        if session is None:
+            return False, "Erro de conexão com o banco"
+        
+        try:
+            usuario = session.query(Usuario).filter_by(id=usuario_id).first()
+            
+            if not usuario:
+                return False, "Usuário não encontrado"
+            
+            usuario.ativo = bool(ativo)
+            
+            # Log
+            status = "ativado" if ativo else "desativado"
+            log = LogAcesso(
+                usuario_id=usuario_id,
+                acao='ALTERACAO_STATUS',
+                descricao=f'Usuário {status}'
+            )
+            session.add(log)
+            
+            session.commit()
+            return True, f"Usuário {status} com sucesso"
+            
+        except Exception as e:
+            session.rollback()
+            return False, f"Erro ao alterar status: {str(e)}"
+        finally:
+            session.close()
+    
+    def alterar_tipo_usuario(self, usuario_id, novo_tipo):
+        """Altera o tipo de usuário (ADM/COMUM)"""
+        session = get_session()
+        if session is None:
+            return False, "Erro de conexão com o banco"
+        
+        try:
+            usuario = session.query(Usuario).filter_by(id=usuario_id).first()
+            
+            if not usuario:
+                return False, "Usuário não encontrado"
+            
+            usuario.tipo = novo_tipo
+            
+            # Log
+            log = LogAcesso(
+                usuario_id=usuario_id,
+                acao='ALTERACAO_TIPO',
+                descricao=f'Tipo alterado para {novo_tipo}'
+            )
+            session.add(log)
+            
+            session.commit()
+            return True, f"Tipo de usuário alterado para {novo_tipo}"
+            
+        except Exception as e:
+            session.rollback()
+            return False, f"Erro ao alterar tipo: {str(e)}"
+        finally:
+            session.close()
+    
+    def alterar_grupo_usuario(self, usuario_id, novo_grupo, novo_compartilhado):
+        """Altera o grupo e status de compartilhamento do usuário"""
+        session = get_session()
+        if session is None:
+            return False, "Erro de conexão com o banco"
+        
+        try:
+            usuario = session.query(Usuario).filter_by(id=usuario_id).first()
+            
+            if not usuario:
+                return False, "Usuário não encontrado"
+            
+            novo_grupo = (novo_grupo or '').strip() or 'padrao'
+            mudou_grupo = usuario.grupo != novo_grupo
+            usuario.grupo = novo_grupo
+            usuario.compartilhado = novo_compartilhado
+            if mudou_grupo:
+                usuario.grupo_id = _obter_grupo(session, novo_grupo).id
+                usuario.historico_pendente = 1
+            
+            # Log
+            compartilhado_str = "compartilhado" if novo_compartilhado else "separado"
+            log = LogAcesso(
+                usuario_id=usuario_id,
+                acao='ALTERACAO_GRUPO',
+                descricao=f'Grupo alterado para {novo_grupo} ({compartilhado_str})'
+            )
+            session.add(log)
+            
+            session.commit()
+            marcar_dados_alterados()
+            if mudou_grupo:
+                agendar_movimentacao_historico(usuario_id)
+            return True, f"Grupo alterado para {novo_grupo} ({compartilhado_str})"
+            
+        except Exception as e:
+            session.rollback()
+            return False, f"Erro ao alterar grupo: {str(e)}"
+        finally:
+            session.close()
+
+    def atualizar_usuarios_em_lote(self, alteracoes, usuario_responsavel=None):
+        """Aplica alterações de vários usuários numa única transação, com um único lote de logs"""
+        campos_editaveis = ('nome', 'email', 'tipo', 'grupo', 'compartilhado', 'ativo')
+        session = get_session()
+        if session is None:
+            return False, "Erro de conexão com o banco"
+        
+        try:
+            alteracoes = {int(a['id']): a for a in alteracoes}
+            if not alteracoes:
+                return True, "Nenhuma alteração para salvar"
+            
+            atuais = {
+                u.id: u for u in session.query(Usuario).filter(Usuario.id.in_(list(alteracoes))).all()
+            }
+            
+            atualizacoes, logs = [], []
+            grupos_alterados = False
+            historicos_a_mover = []
+            for usuario_id, alteracao in alteracoes.items():
+                usuario = atuais.get(usuario_id)
+                if usuario is None:
+                    return False, f"Usuário {usuario_id} não encontrado"
+                
+                novos = {campo: alteracao[campo] for campo in campos_editaveis if campo in alteracao}
+                if 'tipo' in novos and novos['tipo'] not in ('ADM', 'COMUM'):
+                    return False, f"Tipo inválido para {usuario.username}: {novos['tipo']}"
+                if 'grupo' in novos:
+                    novos['grupo'] = (novos['grupo'] or '').strip()
+                    if not novos['grupo']:
+                        return False, f"Informe o grupo de {usuario.username}"
+                if 'compartilhado' in novos:
+                    novos['compartilhado'] = 1 if novos['compartilhado'] else 0
+                if 'ativo' in novos:
+                    novos['ativo'] = bool(novos['ativo'])
+                for campo in ('nome', 'email'):
+                    if campo in novos:
+                        novos[campo] = (novos[campo] or '').strip() or None
+                
+                novos = {campo: valor for campo, valor in novos.items() if getattr(usuario, campo) != valor}
+                if not novos:
+                    continue
+                if usuario.username == usuario_responsavel:
+                    return False, "Não é possível alterar o próprio usuário pela grade"
+                
+                if 'grupo' in novos:
+                    novos['grupo_id'] = _obter_grupo(session, novos['grupo']).id
+                    novos['historico_pendente'] = 1
+                    historicos_a_mover.append(usuario_id)
+                atualizacoes.append({'id': usuario_id, **novos})
+                
+                if 'ativo' in novos:
+                    logs.append({'usuario_id': usuario_id, 'acao': 'ALTERACAO_STATUS',
+                                 'descricao': f"Usuário {'ativado' if novos['ativo'] else 'desativado'}"})
+                if 'tipo' in novos:
+                    logs.append({'usuario_id': usuario_id, 'acao': 'ALTERACAO_TIPO',
+                                 'descricao': f"Tipo alterado para {novos['tipo']}"})
+                if 'grupo' in novos or 'compartilhado' in novos:
+                    grupos_alterados = True
+                    grupo = novos.get('grupo', usuario.grupo)
+                    compartilhado = novos.get('compartilhado', usuario.compartilhado)
+                    logs.append({'usuario_id': usuario_id, 'acao': 'ALTERACAO_GRUPO',
+                                 'descricao': f"Grupo alterado para {grupo} ({'compartilhado' if compartilhado else 'separado'})"})
+                if 'nome' in novos or 'email' in novos:
+                    logs.append({'usuario_id': usuario_id, 'acao': 'ALTERACAO_CADASTRO',
+                                 'descricao': 'Dados cadastrais alterados: ' + ', '.join(c for c in ('nome', 'email') if c in novos)})
+            
+            if not atualizacoes:
+                return True, "Nenhuma alteração para salvar"
+            
+            session.execute(update(Usuario), atualizacoes)
+            session.execute(insert(LogAcesso), logs)
+            session.commit()
+            
+            if grupos_alterados:
+                marcar_dados_alterados()
+            for usuario_id in historicos_a_mover:
+                agendar_movimentacao_historico(usuario_id)
+            registrar_log(logging.INFO, "Usuários alterados em lote", usuarios=len(atualizacoes),
+                          registros_log=len(logs), responsavel=usuario_responsavel)
+            return True, f"{len(atualizacoes)} usuário(s) atualizado(s)"
+            
+        except Exception as e:
+            session.rollback()
+            return False, f"Erro ao atualizar usuários: {str(e)}"
+        finally:
+            session.close()
+
+    @staticmethod
+    def _hash_token(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+    
+    def criar_token_api(self, usuario_id, nome):
+        """Gera um token da API para o usuário; o valor só é mostrado agora"""
+        session = get_session()
+        if session is None:
+            return False, "Erro de conexão com o banco", None
+        
+        try:
+            token = secrets.token_urlsafe(32)
+            session.add(TokenApi(usuario_id=usuario_id, nome=(nome or "API")[:50], token_hash=self._hash_token(token)))
+            session.add(LogAcesso(usuario_id=usuario_id, acao='CRIACAO_TOKEN_API', descricao=f'Token da API criado: {nome}'))
+            session.commit()
+            return True, "Token criado", token
+        except Exception as e:
+            session.rollback()
+            return False, f"Erro ao criar token: {str(e)}", None
+        finally:
+            session.close()
+    
+    def listar_tokens_api(self, usuario_id):
+        """Tokens ativos do usuário (sem o valor)"""
+        session = get_session()
+        if session is None:
+            return []
+        
+        try:
+            tokens = session.query(TokenApi).filter_by(usuario_id=usuario_id, ativo=True).order_by(TokenApi.id).all()
+            return [{'id': t.id, 'nome': t.nome, 'criado_em': t.criado_em} for t in tokens]
+        finally:
+            session.close()
+    
+    def revogar_token_api(self, token_id, usuario_id):
+        """Desativa um token do usuário"""
+        session = get_session()
+        if session is None:
+            return False, "Erro de conexão com o banco"
+        
+        try:
+            revogados = session.query(TokenApi).filter_by(id=token_id, usuario_id=usuario_id).update({TokenApi.ativo: False})
+            if not revogados:
+                return False, "Token não encontrado"
+            session.add(LogAcesso(usuario_id=usuario_id, acao='REVOGACAO_TOKEN_API', descricao=f'Token da API {token_id} revogado'))
+            session.commit()
+            return True, "Token revogado"
+        except Exception as e:
+            session.rollback()
+            return False, f"Erro ao revogar token: {str(e)}"
+        finally:
+            session.close()
+    
+    def usuario_do_token(self, token):
+        """Dados do usuário ativo dono do token, ou None"""
+        session = get_session()
+        if session is None or not token:
+            return None
+        
+        try:
+            usuario = session.query(Usuario).join(TokenApi, TokenApi.usuario_id == Usuario.id).filter(
+                TokenApi.token_hash == self._hash_token(token),
+                TokenApi.ativo == True,
+                Usuario.ativo == True
+            ).first()
+            if usuario is None:
+                return None
+            return {
+                'id': usuario.id,
+                'username': usuario.username,
+                'tipo': usuario.tipo,
+                'grupo': usuario.grupo or 'padrao',
+                'compartilhado': usuario.compartilhado or 0
+            }
+        finally:
+            session.close()
+    
+    def criar_usuario(self, username, senha, tipo="COMUM", nome=None, email=None, grupo="padrao", compartilhado=0):
+        """Cria um novo usuário no sistema"""
+        session = get_session()
+        if session is None:
+            return False, "Erro de conexão com o banco", None
+        
+        try:
+            # Validar força da senha
+            valido, mensagem = self.validar_senha(senha)
+            if not valido:
+                return False, mensagem, None
+            
+            # Verificar se usuário já existe
+            existing_user = session.query(Usuario).filter_by(username=username).first()
+            if existing_user:
+                return False, "Usuário já existe", None
+            
+            # Criar hash da senha
+            senha_hash = self._hash_senha(senha)
+            
+            # Inserir novo usuário
+            novo_usuario = Usuario(
+                username=username,
+                senha_hash=senha_hash,
+                tipo=tipo,
+                nome=nome,
+                email=email,
+                grupo=grupo,
+                grupo_id=_obter_grupo(session, grupo).id,
+                compartilhado=compartilhado
+            )
+            
+            session.add(novo_usuario)
+            session.flush()  # Para obter o ID
+            
+            # Log
+            log = LogAcesso(
+                usuario_id=novo_usuario.id,
+                acao='CRIACAO_USUARIO',
+                descricao=f'Novo usuário criado: {username}'
+            )
+            session.add(log)
+            
+            session.commit()
+            return True, "Usuário criado com sucesso", novo_usuario.id
+            
+        except Exception as e:
+            session.rollback()
+            return False, f"Erro ao criar usuário: {str(e)}", None
+        finally:
+            session.close()
@@ -0,0 +1,293 @@
+"""Teste de carga do Financeiro Familiar: N usuários simultâneos sobre as funções de dados do app.
+
+Execute com:  python -m financeiro carga --usuarios 20 --duracao 60
+
+Cada usuário virtual é uma thread que faz login e repete, com pausas de
+leitura entre as ações, o dashboard, trocas de filtro (Consultar e
+Gerenciar) e inserções. Usuários da mesma família compartilham o grupo,
+então disputam os mesmos dados como no uso real. Com --url-streamlit, cada
+usuário também abre a página e consulta a saúde do servidor Streamlit.
+
+Ao final mostra vazão, percentis de latência por operação, ocupação do pool
+de conexões e esperas por trava no banco.
+
+Grava usuários (carga_001, ...) e transações de verdade: use um banco
+descartável (DATABASE_URL=sqlite:////tmp/carga.db ou um PostgreSQL local).
+"""
+import random
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from financeiro import dados
+from financeiro.assincrono import reunir_consultas
+from financeiro.carga_tardia import ModuloTardio
+from financeiro.recorrencia import projetar_fluxo_caixa
+
+pd = ModuloTardio('pandas')
+np = ModuloTardio('numpy')
+
+SENHA_CARGA = "Carga2025"
+PESOS_OPERACOES = {'dashboard': 3, 'filtros': 5, 'insercao': 2, 'streamlit': 1}
+INTERVALO_AMOSTRAGEM_S = 0.05
+AMOSTRAS_POR_CONSULTA_TRAVAS = 5   # no PostgreSQL, pg_stat_activity a cada 5 amostras do pool
+CATEGORIAS_CARGA = ['Alimentação', 'Transporte', 'Moradia', 'Lazer', 'Saúde', 'Outros']
+FORMAS_CARGA = ['Pix', 'Débito', 'Dinheiro']
+
+# Trechos das mensagens de erro que indicam disputa por recurso
+MARCAS_TRAVA = ('database is locked', 'deadlock', 'lock timeout', 'could not obtain lock')
+MARCA_POOL_ESGOTADO = 'QueuePool limit'
+
+class Resultados:
+    """Latências e erros por operação, registrados pelas threads dos usuários virtuais"""
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.erros = defaultdict(list)
+
+    def registrar(self, operacao, duracao_ms, erros):
+        with self.trava:
+            self.latencias[operacao].append(duracao_ms)
+            self.erros[operacao].extend(erros)
+
+class Amostrador(threading.Thread):
+    """Amostra a ocupação dos pools de conexão e, no PostgreSQL, as sessões esperando trava"""
+    def __init__(self, intervalo_s=INTERVALO_AMOSTRAGEM_S):
+        super().__init__(daemon=True)
+        self.intervalo_s = intervalo_s
+        self.pools = {'primario': dados.engine.pool}
+        if dados.engine_leitura is not None and dados.engine_leitura is not dados.engine:
+            self.pools['leitura'] = dados.engine_leitura.pool
+        self.ocupacao = {papel: [] for papel in self.pools}
+        self.esperando_trava = []
+        self._parar = threading.Event()
+        # Conexão própria, fora do pool medido
+        self._monitor = None
+        if dados.engine.dialect.name == 'postgresql':
+            self._monitor = create_engine(dados.engine.url, poolclass=NullPool)
+
+    def run(self):
+        amostras = 0
+        while not self._parar.wait(self.intervalo_s):
+            for papel, pool in self.pools.items():
+                self.ocupacao[papel].append(pool.checkedout())
+            if self._monitor is not None and amostras % AMOSTRAS_POR_CONSULTA_TRAVAS == 0:
+                try:
+                    with self._monitor.connect() as conn:
+                        self.esperando_trava.append(conn.execute(text(
+                            "SELECT count(*) FROM pg_stat_activity "
+                            "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+                        )).scalar())
+                except Exception as e:
+                    dados.registrar_log(dados.logging.WARNING, "Erro ao amostrar travas", erro=str(e))
+            amostras += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+        if self._monitor is not None:
+            self._monitor.dispose()
+
+# ---------- Preparação ----------
+def _historico(quantidade, aleatorio):
+    """Extrato fictício dos últimos dois anos, no formato de importar_transacoes"""
+    hoje = date.today()
+    linhas = []
+    for _ in range(quantidade):
+        receita = aleatorio.random() < 0.15
+        linhas.append({
+            'data': hoje - timedelta(days=aleatorio.randint(0, 730)),
+            'descricao': "Salário" if receita else f"Compra {aleatorio.randint(1, 500)}",
+            'valor': round(aleatorio.uniform(2000, 6000) if receita else aleatorio.uniform(5, 400), 2),
+            'tipo': "Receita" if receita else "Despesa",
+            'categoria': "Salário" if receita else aleatorio.choice(CATEGORIAS_CARGA),
+            'forma': aleatorio.choice(FORMAS_CARGA)
+        })
+    return pd.DataFrame(linhas)
+
+def preparar_usuarios(quantidade, por_familia=2, historico=200):
+    """Cria (se faltarem) os usuários carga_NNN em famílias com base compartilhada; retorna os usernames"""
+    aleatorio = random.Random(0)
+    contas = []
+    for indice in range(1, quantidade + 1):
+        username = f"carga_{indice:03d}"
+        familia = f"carga_familia_{(indice - 1) // max(por_familia, 1) + 1:03d}"
+        sucesso, mensagem, usuario_id = dados.auth.criar_usuario(
+            username, SENHA_CARGA, nome=f"Usuário de carga {indice}", grupo=familia, compartilhado=1
+        )
+        if sucesso and historico:
+            dados.importar_transacoes(_historico(historico, aleatorio), usuario_id)
+        elif not sucesso and mensagem != "Usuário já existe":
+            raise RuntimeError(f"Erro ao criar {username}: {mensagem}")
+        contas.append(username)
+    return contas
+
+# ---------- Operações de um usuário ----------
+def _dashboard(usuario_id, aleatorio):
+    hoje = date.today()
+    reunir_consultas(
+        resumo=lambda: dados.resumo_mensal(usuario_id, hoje.year, hoje.month),
+        ultimas=lambda: dados.listar_transacoes(usuario_id, por_pagina=10),
+        orcamentos=lambda: dados.situacao_orcamentos(usuario_id),
+        serie=lambda: dados.carregar_serie_mensal(usuario_id, date(hoje.year - 1, hoje.month, 1), hoje),
+        projecao=lambda: projetar_fluxo_caixa(usuario_id, 12)
+    )
+
+def _filtros(usuario_id, aleatorio):
+    # Consultar Finanças: mês/ano/tipo/forma sobre o livro em cache
+    hoje = date.today()
+    dados.consultar_financas(
+        usuario_id, aleatorio.choice(['data_pagamento', 'data_registro']),
+        mes=aleatorio.choice([None, *range(1, 13)]), ano=aleatorio.choice([None, hoje.year, hoje.year - 1]),
+        tipo=aleatorio.choice([None, 'Receita', 'Despesa']), forma=aleatorio.choice([None, *FORMAS_CARGA])
+    )
+    # Gerenciar Transações: filtro por categoria e página filtrada no banco (API)
+    categoria = aleatorio.choice(CATEGORIAS_CARGA)
+    dados.filtrar_transacoes(usuario_id, categoria=categoria)
+    dados.listar_transacoes(usuario_id, categoria=categoria, pagina=aleatorio.randint(1, 3))
+
+def _insercao(usuario_id, aleatorio):
+    dia = date.today() - timedelta(days=aleatorio.randint(0, 60))
+    if not dados.inserir_transacao(
+        'Despesa', dia, dia, f"Carga {aleatorio.randint(1, 10 ** 6)}", round(aleatorio.uniform(5, 300), 2),
+        aleatorio.choice(CATEGORIAS_CARGA), aleatorio.choice(FORMAS_CARGA), {}, usuario_id
+    ):
+        dados.avisar_erro("Inserção não gravada")
+
+def _streamlit(url, caminho):
+    with urllib.request.urlopen(url.rstrip('/') + caminho, timeout=30) as resposta:
+        resposta.read()
+
+def _executar(resultados, operacao, funcao, *args):
+    """Roda a operação medindo a duração e juntando os erros avisados e as exceções"""
+    inicio = time.perf_counter()
+    with dados.coletar_erros() as erros:
+        try:
+            retorno = funcao(*args)
+        except Exception as e:
+            erros.append(f"{type(e).__name__}: {e}")
+            retorno = None
+        avisados = list(erros)
+    resultados.registrar(operacao, (time.perf_counter() - inicio) * 1000, avisados)
+    return retorno
+
+def usuario_virtual(username, fim, pausa_s, resultados, url_streamlit=None, semente=None):
+    """Uma sessão: login e ações sorteadas por PESOS_OPERACOES até o instante fim (time.monotonic)"""
+    aleatorio = random.Random(semente)
+    if url_streamlit:
+        _executar(resultados, 'streamlit', _streamlit, url_streamlit, '/')
+    login = _executar(resultados, 'login', dados.auth.autenticar, username, SENHA_CARGA)
+    if not login or not login[0]:
+        return
+    usuario_id = login[1]['id']
+
+    operacoes = {'dashboard': _dashboard, 'filtros': _filtros, 'insercao': _insercao}
+    nomes = list(operacoes) + (['streamlit'] if url_streamlit else [])
+    pesos = [PESOS_OPERACOES[nome] for nome in nomes]
+    while time.monotonic() < fim:
+        operacao = aleatorio.choices(nomes, pesos)[0]
+        if operacao == 'streamlit':
+            _executar(resultados, operacao, _streamlit, url_streamlit, '/_stcore/health')
+        else:
+            _executar(resultados, operacao, operacoes[operacao], usuario_id, aleatorio)
+        if pausa_s:
+            time.sleep(min(aleatorio.expovariate(1 / pausa_s), max(fim - time.monotonic(), 0)))
+
+# ---------- Execução e relatório ----------
+def _percentis(valores):
+    p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+    return {'p50_ms': round(p50, 1), 'p95_ms': round(p95, 1), 'p99_ms': round(p99, 1), 'max_ms': round(max(valores), 1)}
+
+def executar_carga(usuarios=10, duracao_s=60, pausa_s=1.0, por_familia=2, historico=200, url_streamlit=None):
+    """Roda o teste e retorna o relatório (dict com DataFrames e totais)"""
+    contas = preparar_usuarios(usuarios, por_familia, historico)
+    resultados = Resultados()
+    dados.limpar_metricas()
+
+    amostrador = Amostrador()
+    amostrador.start()
+    inicio = time.monotonic()
+    fim = inicio + duracao_s
+    threads = [
+        threading.Thread(target=usuario_virtual, args=(conta, fim, pausa_s, resultados, url_streamlit, indice),
+                         name=f"carga-{conta}", daemon=True)
+        for indice, conta in enumerate(contas)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    decorrido = time.monotonic() - inicio
+    amostrador.parar()
+
+    linhas = []
+    for operacao, latencias in sorted(resultados.latencias.items()):
+        linhas.append({'operacao': operacao, 'execucoes': len(latencias),
+                       'por_segundo': round(len(latencias) / decorrido, 2),
+                       'erros': len(resultados.erros[operacao]), **_percentis(latencias)})
+    todos_erros = [erro for erros in resultados.erros.values() for erro in erros]
+
+    capacidade = dados.TAMANHO_POOL + dados.MAXIMO_EXCEDENTE_POOL
+    pools = []
+    for papel, ocupacao in amostrador.ocupacao.items():
+        if ocupacao:
+            pools.append({
+                'pool': papel, 'capacidade': capacidade, 'media': round(float(np.mean(ocupacao)), 1),
+                'p95': float(np.percentile(ocupacao, 95)), 'pico': max(ocupacao),
+                'acima_do_pool_pct': round(100 * sum(o > dados.TAMANHO_POOL for o in ocupacao) / len(ocupacao), 1),
+                'esgotado_pct': round(100 * sum(o >= capacidade for o in ocupacao) / len(ocupacao), 1)
+            })
+
+    # Escritas no SQLite esperam a trava do arquivo dentro do próprio comando: a latência delas mostra a espera
+    spans = dados.percentis_spans()
+    escritas = spans[spans['span'].str.match(r'sql (INSERT|UPDATE|DELETE)')].sort_values('total_ms', ascending=False)
+
+    return {
+        'banco': dados.engine.dialect.name,
+        'usuarios': usuarios,
+        'duracao_s': round(decorrido, 1),
+        'operacoes': pd.DataFrame(linhas),
+        'vazao': round(sum(r['execucoes'] for r in linhas) / decorrido, 2),
+        'pools': pd.DataFrame(pools),
+        'pool_esgotado_erros': sum(MARCA_POOL_ESGOTADO in erro for erro in todos_erros),
+        'trava_erros': sum(any(marca in erro.lower() for marca in MARCAS_TRAVA) for erro in todos_erros),
+        'esperando_trava': amostrador.esperando_trava,
+        'escritas': escritas.reset_index(drop=True),
+        'sql_mais_lento': spans[spans['span'].str.startswith('sql ')].nlargest(5, 'total_ms').reset_index(drop=True),
+        'exemplos_erros': list(dict.fromkeys(todos_erros))[:5]
+    }
+
+def imprimir_relatorio(relatorio):
+    """Relatório em texto para o terminal"""
+    print(f"\n{relatorio['usuarios']} usuário(s) simultâneo(s) por {relatorio['duracao_s']}s em {relatorio['banco']}")
+    print(f"Vazão: {relatorio['vazao']} operações/s\n")
+    if not relatorio['operacoes'].empty:
+        print(relatorio['operacoes'].to_string(index=False))
+
+    print("\nPool de conexões (conexões em uso, amostradas a cada "
+          f"{INTERVALO_AMOSTRAGEM_S * 1000:.0f} ms; pool_size={dados.TAMANHO_POOL}, max_overflow={dados.MAXIMO_EXCEDENTE_POOL})")
+    if not relatorio['pools'].empty:
+        print(relatorio['pools'].to_string(index=False))
+    print(f"Esperas que estouraram o tempo do pool: {relatorio['pool_esgotado_erros']}")
+
+    print("\nTravas no banco")
+    print(f"Erros por trava (database is locked, deadlock, lock timeout): {relatorio['trava_erros']}")
+    if relatorio['esperando_trava']:
+        esperando = relatorio['esperando_trava']
+        print(f"Sessões esperando trava (pg_stat_activity): média {np.mean(esperando):.1f}, pico {max(esperando)}")
+    if not relatorio['escritas'].empty:
+        print("Escritas (no SQLite, inclui a espera pela trava do arquivo):")
+        print(relatorio['escritas'][['span', 'amostras', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']].to_string(index=False))
+
+    if not relatorio['sql_mais_lento'].empty:
+        print("\nSQL com maior tempo total")
+        print(relatorio['sql_mais_lento'][['span', 'amostras', 'p50_ms', 'p95_ms', 'total_ms']].to_string(index=False))
+    if relatorio['exemplos_erros']:
+        print("\nExemplos de erros:")
+        for erro in relatorio['exemplos_erros']:
+            print(f"  {erro}")
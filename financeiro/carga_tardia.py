@@ -0,0 +1,20 @@
+"""Importação tardia de dependências pesadas (pandas, numpy, plotly).
+
+O módulo real só é importado no primeiro acesso a um atributo, então quem
+importa a camada de dados sem precisar de DataFrames não paga por eles.
+"""
+import importlib
+
+class ModuloTardio:
+    """Representa um módulo que é importado no primeiro uso"""
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nome)
+        return getattr(self._modulo, atributo)
+
+    def __repr__(self):
+        return f"<módulo tardio {self._nome!r}{' (carregado)' if self._modulo is not None else ''}>"
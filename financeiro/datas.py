@@ -0,0 +1,52 @@
+"""Cálculos de datas do Financeiro Familiar (meses, ciclos de fatura, anos).
+
+Funções puras, sem banco nem dependências pesadas.
+"""
+import calendar
+from datetime import date
+
+def ajustar_para_fatura(data_compra, dia_fatura=10):
+    if data_compra.month == 12:
+        return date(data_compra.year + 1, 1, dia_fatura)
+    else:
+        return date(data_compra.year, data_compra.month + 1, dia_fatura)
+
+def data_no_mes(ano, mes, dia):
+    """Cria a data limitando o dia ao último dia do mês"""
+    return date(ano, mes, min(int(dia), calendar.monthrange(ano, mes)[1]))
+
+def somar_meses(ano, mes, meses):
+    """Retorna (ano, mes) deslocado em meses"""
+    total = ano * 12 + (mes - 1) + meses
+    return total // 12, total % 12 + 1
+
+def calcular_ciclo_fatura(data_compra, dia_fechamento, dia_vencimento):
+    """Retorna (data_fechamento, data_vencimento) da fatura que recebe a compra.
+
+    Compras até o dia de fechamento entram na fatura do mês; depois dele,
+    na do mês seguinte. Com fechamento no último dia do mês o resultado é
+    igual ao de ajustar_para_fatura.
+    """
+    fechamento = data_no_mes(data_compra.year, data_compra.month, dia_fechamento)
+    if data_compra > fechamento:
+        ano, mes = somar_meses(data_compra.year, data_compra.month, 1)
+        fechamento = data_no_mes(ano, mes, dia_fechamento)
+
+    if dia_vencimento > dia_fechamento:
+        ano, mes = fechamento.year, fechamento.month
+    else:
+        ano, mes = somar_meses(fechamento.year, fechamento.month, 1)
+
+    return fechamento, data_no_mes(ano, mes, dia_vencimento)
+
+def fechamento_pelo_vencimento(data_vencimento, dia_fechamento, dia_vencimento):
+    """Data de fechamento da fatura que vence em data_vencimento"""
+    if dia_vencimento > dia_fechamento:
+        ano, mes = data_vencimento.year, data_vencimento.month
+    else:
+        ano, mes = somar_meses(data_vencimento.year, data_vencimento.month, -1)
+    return data_no_mes(ano, mes, dia_fechamento)
+
+def limites_ano(ano):
+    """Primeiro dia do ano e primeiro dia do ano seguinte (intervalo semiaberto)"""
+    return date(ano, 1, 1), date(ano + 1, 1, 1)
@@ -0,0 +1,218 @@
+"""Modelos SQLAlchemy do Financeiro Familiar.
+
+Só descrevem as tabelas: importar este módulo não abre conexão nem cria nada
+no banco (isso é feito por dados.inicializar()).
+"""
+from datetime import datetime
+from sqlalchemy import Table, Column, Integer, BigInteger, String, Float, Date, Boolean, TIMESTAMP, UniqueConstraint, Index
+from sqlalchemy.ext.declarative import declarative_base
+
+Base = declarative_base()
+
+class Usuario(Base):
+    __tablename__ = 'usuarios'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    username = Column(String(50), unique=True, nullable=False)
+    senha_hash = Column(String(255), nullable=False)
+    tipo = Column(String(10), nullable=False, default='COMUM')
+    nome = Column(String(100))
+    email = Column(String(100))
+    ativo = Column(Boolean, default=True)
+    grupo = Column(String(50), default='padrao')
+    grupo_id = Column(Integer, index=True)
+    historico_pendente = Column(Integer, default=0)  # 1 = transações ainda no grupo anterior
+    compartilhado = Column(Integer, default=1)
+    pode_compartilhar = Column(Integer, default=0)
+    data_criacao = Column(TIMESTAMP, default=datetime.utcnow)
+    data_ultimo_login = Column(TIMESTAMP)
+
+class Grupo(Base):
+    __tablename__ = 'grupos'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    nome = Column(String(50), unique=True, nullable=False)
+    data_criacao = Column(TIMESTAMP, default=datetime.utcnow)
+
+class Transacao(Base):
+    __tablename__ = 'transacoes'
+    __table_args__ = (
+        Index('ix_transacoes_grupo_data', 'grupo_id', 'data_pagamento'),
+        Index('ix_transacoes_usuario_data', 'usuario_id', 'data_pagamento'),
+        Index('ix_transacoes_data_pagamento', 'data_pagamento'),
+        Index('ix_transacoes_impressao', 'impressao'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    data_registro = Column(Date)
+    data_pagamento = Column(Date)
+    pessoa = Column(String)
+    categoria = Column(String)
+    tipo = Column(String)
+    valor = Column(Float)
+    valor_centavos = Column(BigInteger)  # valor exato; somas e totais partem daqui
+    descricao = Column(String)
+    recorrente = Column(Integer, default=0)
+    dia_fixo = Column(Integer)
+    pessoa_responsavel = Column(String, default='Ambos')
+    no_cartao = Column(Integer, default=0)
+    investimento = Column(Integer, default=0)
+    vr = Column(Integer, default=0)
+    forma_pagamento = Column(String, default='Dinheiro')
+    parcelas = Column(Integer, default=1)
+    parcela_atual = Column(Integer, default=1)
+    status = Column(String, default='Ativa')
+    usuario_id = Column(Integer)
+    grupo = Column(String, default='padrao')
+    grupo_id = Column(Integer)
+    compartilhado = Column(Integer, default=0)
+    cartao_id = Column(Integer)
+    fatura_id = Column(Integer, index=True)
+    data_exclusao = Column(TIMESTAMP)
+    impressao = Column(String(40))  # hash de usuário, data, valor, descrição e forma (duplicadas)
+
+# Transações excluídas retiradas pela compactação (mesmas colunas, restauráveis até o expurgo)
+transacoes_excluidas = Table(
+    'transacoes_excluidas', Base.metadata,
+    *[Column(c.name, c.type, primary_key=c.primary_key) for c in Transacao.__table__.columns],
+    Column('compactacao_id', Integer, index=True),
+    Column('compactado_em', TIMESTAMP)
+)
+
+class Compactacao(Base):
+    """Execução da compactação de transações excluídas, com o relatório do que foi recuperado"""
+    __tablename__ = 'compactacoes'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    iniciado_em = Column(TIMESTAMP, default=datetime.utcnow)
+    concluido_em = Column(TIMESTAMP)
+    dias_retencao = Column(Integer)
+    movidas = Column(Integer, default=0)
+    status_normalizados = Column(Integer, default=0)
+    expurgadas = Column(Integer, default=0)
+    bytes_antes = Column(Integer)
+    bytes_depois = Column(Integer)
+    desfeita = Column(Integer, default=0)
+
+class LogAcesso(Base):
+    __tablename__ = 'logs_acesso'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    usuario_id = Column(Integer)
+    acao = Column(String(50))
+    descricao = Column(String)
+    data_hora = Column(TIMESTAMP, default=datetime.utcnow)
+
+class TokenApi(Base):
+    """Token de acesso à API em nome de um usuário (só o hash fica gravado)"""
+    __tablename__ = 'tokens_api'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    usuario_id = Column(Integer, nullable=False, index=True)
+    nome = Column(String(50))
+    token_hash = Column(String(64), nullable=False, unique=True)
+    criado_em = Column(TIMESTAMP, default=datetime.utcnow)
+    ativo = Column(Boolean, default=True)
+
+class Cartao(Base):
+    __tablename__ = 'cartoes'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    usuario_id = Column(Integer, nullable=False, index=True)
+    nome = Column(String(50), nullable=False)
+    dia_fechamento = Column(Integer)  # NULL = último dia do mês
+    dia_vencimento = Column(Integer)  # NULL = dia_fatura das configurações
+    padrao = Column(Integer, default=0)
+    ativo = Column(Boolean, default=True)
+    data_criacao = Column(TIMESTAMP, default=datetime.utcnow)
+
+class Fatura(Base):
+    __tablename__ = 'faturas'
+    __table_args__ = (
+        UniqueConstraint('cartao_id', 'data_vencimento', name='uq_faturas_cartao_vencimento'),
+        Index('ix_faturas_cartao_status_vencimento', 'cartao_id', 'status', 'data_vencimento'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cartao_id = Column(Integer, nullable=False)
+    data_fechamento = Column(Date)
+    data_vencimento = Column(Date, nullable=False)
+    total_centavos = Column(BigInteger, default=0)
+    status = Column(String(20), default='Aberta')  # Aberta, Fechada, Paga
+    data_pagamento_fatura = Column(Date)
+
+class Orcamento(Base):
+    __tablename__ = 'orcamentos'
+    __table_args__ = (
+        UniqueConstraint('escopo_tipo', 'escopo_chave', 'categoria', name='uq_orcamentos_escopo_categoria'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    escopo_tipo = Column(String(10), nullable=False)  # todos, grupo, usuario
+    escopo_chave = Column(String(50), nullable=False, default='')
+    categoria = Column(String, nullable=False)
+    limite = Column(Float, nullable=False)  # em reais, espelho de limite_centavos
+    limite_centavos = Column(BigInteger)
+    alerta_percentual = Column(Integer, default=80)
+    data_criacao = Column(TIMESTAMP, default=datetime.utcnow)
+
+class GastoMensal(Base):
+    """Total de despesas por mês, categoria, usuário e grupo, mantido pelas escritas"""
+    __tablename__ = 'gastos_mensais'
+    __table_args__ = (
+        UniqueConstraint('ano_mes', 'categoria', 'usuario_id', 'grupo', name='uq_gastos_mensais_chave'),
+        Index('ix_gastos_mensais_grupo_mes', 'grupo', 'ano_mes'),
+        Index('ix_gastos_mensais_usuario_mes', 'usuario_id', 'ano_mes'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ano_mes = Column(String(7), nullable=False)
+    categoria = Column(String, nullable=False)
+    usuario_id = Column(Integer)
+    grupo = Column(String(50), nullable=False, default='padrao')
+    total_centavos = Column(BigInteger, default=0)
+
+class AnoArquivado(Base):
+    """Ano de transações retirado da tabela principal (partição desanexada ou tabela de arquivo)"""
+    __tablename__ = 'anos_arquivados'
+    
+    ano = Column(Integer, primary_key=True, autoincrement=False)
+    tabela = Column(String(63), nullable=False)
+    modo = Column(String(10), nullable=False)  # particao, tabela
+    linhas = Column(Integer, default=0)
+    arquivado_em = Column(TIMESTAMP, default=datetime.utcnow)
+
+class SaldoArquivado(Base):
+    """Totais por usuário, grupo e tipo de um ano arquivado, para os saldos acumulados"""
+    __tablename__ = 'saldos_arquivados'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ano = Column(Integer, nullable=False, index=True)
+    usuario_id = Column(Integer)
+    grupo_id = Column(Integer)
+    tipo = Column(String)
+    total_centavos = Column(BigInteger, default=0)
+
+class Configuracao(Base):
+    """Configuração global (valor em JSON); versao cresce a cada alteração da chave"""
+    __tablename__ = 'configuracoes'
+    
+    chave = Column(String(50), primary_key=True)
+    valor = Column(String, nullable=False)
+    versao = Column(Integer, nullable=False, default=1)
+    atualizado_em = Column(TIMESTAMP, default=datetime.utcnow)
+
+class ContadorGlobal(Base):
+    """Contador compartilhado pelas instâncias (ex.: versão dos dados, que invalida os caches)"""
+    __tablename__ = 'contadores'
+    
+    nome = Column(String(50), primary_key=True)
+    valor = Column(BigInteger, nullable=False, default=0)
+
+class TravaExecucao(Base):
+    """Tarefa em execução por uma instância; vale até expira_em, mesmo se o dono cair"""
+    __tablename__ = 'travas_execucao'
+    
+    nome = Column(String(100), primary_key=True)
+    dono = Column(String(32), nullable=False)
+    expira_em = Column(TIMESTAMP, nullable=False)
@@ -0,0 +1,336 @@
+"""Recorrências do Financeiro Familiar: geração das ocorrências mensais e projeção de fluxo de caixa."""
+import calendar
+import re
+from datetime import date
+
+from sqlalchemy import case
+
+from financeiro.carga_tardia import ModuloTardio
+from financeiro.datas import somar_meses, calcular_ciclo_fatura
+from financeiro.dados import (
+    SUFIXO_RECORRENCIA, cronometrar, avisar_erro, get_session, escopo_usuario, filtro_escopo,
+    filtro_transacoes_ativas, versao_dados, marcar_dados_alterados, soma_reais, cache_compartilhado,
+    saldo_arquivado, _expressao_mes, normalizar_descricao, dias_do_cartao, _atualizar_agregados,
+    adquirir_trava, liberar_trava, sessao_leitura_versionada
+)
+from financeiro.modelos import Transacao, Cartao
+
+pd = ModuloTardio('pandas')
+np = ModuloTardio('numpy')
+
+LIMITE_PROJECOES_CACHE = 64
+LIMITE_VERIFICACOES_RECORRENCIAS = 1024
+DURACAO_TRAVA_RECORRENCIAS_S = 300
+TAMANHO_LOTE_VAGAS = 500  # descrições por consulta de vagas ocupadas (limite de parâmetros do SQLite)
+
+# ---------- Projeção de Fluxo de Caixa ----------
+def expandir_recorrencias(df_recorrentes, hoje, data_fim):
+    """Expande as recorrências mês a mês de forma vetorizada, sem gravar nada.
+
+    Cada série recorrente (mesmo usuário, tipo e descrição sem o sufixo
+    "(MM/AAAA)") continua a partir da sua última ocorrência gravada. Retorna
+    um DataFrame com data_pagamento, tipo e valor das ocorrências entre
+    amanhã e data_fim.
+    """
+    colunas = ['data_pagamento', 'tipo', 'valor']
+    if df_recorrentes.empty:
+        return pd.DataFrame(columns=colunas)
+
+    df = df_recorrentes.dropna(subset=['data_pagamento']).copy()
+    if df.empty:
+        return pd.DataFrame(columns=colunas)
+
+    df['data_pagamento'] = pd.to_datetime(df['data_pagamento'])
+    df['serie'] = df['descricao'].fillna('').str.replace(SUFIXO_RECORRENCIA, '', regex=True)
+
+    # Última ocorrência gravada de cada série
+    ultimas = df.loc[df.groupby(['usuario_id', 'tipo', 'serie'], dropna=False)['data_pagamento'].idxmax()]
+
+    # Compras no cartão seguem o dia da fatura; as demais, o dia fixo
+    dia = np.where(
+        ultimas['no_cartao'].fillna(0).to_numpy() == 1,
+        ultimas['data_pagamento'].dt.day.to_numpy(),
+        ultimas['dia_fixo'].fillna(ultimas['data_pagamento'].dt.day).to_numpy()
+    ).astype(int)
+
+    meses_a_frente = (data_fim.year - hoje.year) * 12 + (data_fim.month - hoje.month)
+    mes_base = (ultimas['data_pagamento'].dt.year * 12 + ultimas['data_pagamento'].dt.month - 1).to_numpy()
+    desde_ultima = (hoje.year * 12 + hoje.month - 1) - mes_base
+    passos = np.arange(1, max(int(desde_ultima.max()), 0) + meses_a_frente + 2)
+
+    # Matriz séries x meses, achatada em um vetor de ocorrências
+    indice_mes = (mes_base[:, None] + passos[None, :]).ravel()
+    primeiro_dia = pd.to_datetime(pd.DataFrame({
+        'year': indice_mes // 12,
+        'month': indice_mes % 12 + 1,
+        'day': 1
+    }))
+    dias = np.minimum(np.repeat(dia, len(passos)), primeiro_dia.dt.days_in_month.to_numpy())
+    datas = primeiro_dia + pd.to_timedelta(dias - 1, unit='D')
+
+    ocorrencias = pd.DataFrame({
+        'data_pagamento': datas.to_numpy(),
+        'tipo': np.repeat(ultimas['tipo'].to_numpy(), len(passos)),
+        'valor': np.repeat(ultimas['valor'].astype(float).to_numpy(), len(passos))
+    })
+    limite_inicio = pd.Timestamp(hoje)
+    limite_fim = pd.Timestamp(data_fim)
+    return ocorrencias[
+        (ocorrencias['data_pagamento'] > limite_inicio) & (ocorrencias['data_pagamento'] <= limite_fim)
+    ].reset_index(drop=True)
+
+@cronometrar()
+def projetar_fluxo_caixa(usuario_id, meses=12):
+    """Projeta receitas, despesas e saldo esperado para os próximos meses.
+
+    Combina o saldo realizado até hoje, as transações já gravadas com data
+    futura (parcelas, faturas) e a expansão em memória das recorrências.
+    O resultado fica em cache pela versão dos dados.
+
+    Retorna (df_projecao, saldo_atual).
+    """
+    hoje = date.today()
+    ano_fim, mes_fim = somar_meses(hoje.year, hoje.month, meses - 1)
+    data_fim = date(ano_fim, mes_fim, calendar.monthrange(ano_fim, mes_fim)[1])
+    indice = pd.period_range(hoje, data_fim, freq='M').to_timestamp()
+
+    session, versao = sessao_leitura_versionada()
+    if session is None:
+        return pd.DataFrame(), 0.0
+
+    try:
+        escopo = escopo_usuario(session, usuario_id)
+        chave = (escopo, versao, meses, hoje)
+
+        cache = cache_compartilhado('projecoes', LIMITE_PROJECOES_CACHE)
+        em_cache = cache.obter(chave)
+        if em_cache is not None:
+            df_projecao, saldo_atual = em_cache
+            return df_projecao.copy(), saldo_atual
+
+        condicao = filtro_escopo(escopo)
+        filtros = [filtro_transacoes_ativas()] if condicao is None else [filtro_transacoes_ativas(), condicao]
+
+        sinal = case((Transacao.tipo == 'Receita', Transacao.valor_centavos), else_=-Transacao.valor_centavos)
+        saldo_atual = float(session.query(soma_reais(sinal)).filter(
+            *filtros, Transacao.data_pagamento <= hoje
+        ).scalar() or 0.0) + saldo_arquivado(session, escopo)
+
+        # Transações já gravadas com vencimento futuro (parcelas, faturas, recorrências de cartão)
+        mes = _expressao_mes(Transacao.data_pagamento).label('mes')
+        futuras = session.query(mes, Transacao.tipo, soma_reais(Transacao.valor_centavos)).filter(
+            *filtros, Transacao.data_pagamento > hoje, Transacao.data_pagamento <= data_fim
+        ).group_by(mes, Transacao.tipo).all()
+
+        recorrentes = session.query(
+            Transacao.usuario_id, Transacao.tipo, Transacao.descricao, Transacao.valor,
+            Transacao.dia_fixo, Transacao.no_cartao, Transacao.data_pagamento
+        ).filter(*filtros, Transacao.recorrente == 1).all()
+    except Exception as e:
+        avisar_erro(f"Erro ao projetar fluxo de caixa: {e}")
+        return pd.DataFrame(), 0.0
+    finally:
+        session.close()
+
+    df_futuras = pd.DataFrame(futuras, columns=['mes', 'tipo', 'valor'])
+    if not df_futuras.empty:
+        df_futuras['mes'] = pd.PeriodIndex(df_futuras['mes'], freq='M').to_timestamp()
+
+    df_recorrentes = pd.DataFrame(recorrentes, columns=[
+        'usuario_id', 'tipo', 'descricao', 'valor', 'dia_fixo', 'no_cartao', 'data_pagamento'
+    ])
+    df_expandidas = expandir_recorrencias(df_recorrentes, hoje, data_fim)
+    if not df_expandidas.empty:
+        df_expandidas['mes'] = df_expandidas['data_pagamento'].dt.to_period('M').dt.to_timestamp()
+
+    previstas = pd.concat([
+        df_futuras[['mes', 'tipo', 'valor']],
+        df_expandidas[['mes', 'tipo', 'valor']] if not df_expandidas.empty else None
+    ])
+    previstas['valor'] = previstas['valor'].astype(float)
+    por_tipo = previstas.pivot_table(index='mes', columns='tipo', values='valor', aggfunc='sum', fill_value=0.0)
+
+    df_projecao = pd.DataFrame(index=indice)
+    df_projecao['receitas'] = por_tipo['Receita'].reindex(indice, fill_value=0.0) if 'Receita' in por_tipo else 0.0
+    df_projecao['despesas'] = por_tipo['Despesa'].reindex(indice, fill_value=0.0) if 'Despesa' in por_tipo else 0.0
+    df_projecao['saldo_mes'] = df_projecao['receitas'] - df_projecao['despesas']
+    df_projecao['saldo_previsto'] = saldo_atual + df_projecao['saldo_mes'].cumsum()
+
+    cache.guardar(chave, (df_projecao, saldo_atual))
+
+    return df_projecao.copy(), saldo_atual
+
+@cronometrar()
+def processar_recorrencias_automaticas(usuario_id=None):
+    """Processa transações recorrentes automaticamente.
+
+    Roda uma vez por usuário, dia e versão dos dados: com o cache
+    compartilhado em SQLite, uma verificação feita por qualquer réplica
+    vale para as demais. A trava no banco impede que duas instâncias (ou
+    duas sessões) gerem as mesmas ocorrências ao mesmo tempo.
+    """
+    hoje = date.today()
+    verificacoes = cache_compartilhado('recorrencias', LIMITE_VERIFICACOES_RECORRENCIAS)
+    if verificacoes.obter((usuario_id, hoje, versao_dados())):
+        return 0
+
+    nome_trava = f"recorrencias:{usuario_id or 'todos'}"
+    dono = adquirir_trava(nome_trava, DURACAO_TRAVA_RECORRENCIAS_S)
+    if dono is None:
+        return 0  # outra instância está processando
+    try:
+        novas_transacoes = _gerar_recorrencias(usuario_id, hoje)
+    finally:
+        liberar_trava(nome_trava, dono)
+    verificacoes.guardar((usuario_id, hoje, versao_dados()), True)
+    return novas_transacoes
+
+def _vaga_recorrencia(usuario_id, descricao, data_pagamento):
+    """(usuário, série, (ano, mês) de competência) de uma ocorrência recorrente.
+
+    A competência vem do sufixo "(MM/AAAA)" das ocorrências geradas; sem ele,
+    do mês de pagamento. Valor, forma e a data ajustada à fatura ficam de fora:
+    editar a ocorrência ou mudar o ciclo do cartão não a torna "nova".
+    """
+    sufixo = re.search(r'\((\d{2})/(\d{4})\)$', descricao or '')
+    if sufixo:
+        competencia = (int(sufixo.group(2)), int(sufixo.group(1)))
+    elif data_pagamento:
+        competencia = (data_pagamento.year, data_pagamento.month)
+    else:
+        competencia = None
+    return usuario_id, normalizar_descricao(descricao), competencia
+
+def _vagas_ocupadas(session, candidatas):
+    """Quais das vagas candidatas já têm ocorrência gravada, inclusive excluída (excluir não pede para gerar de novo).
+
+    candidatas: {vaga: descrição gerada}. Só são lidas as ocorrências que
+    podem ocupá-las: do mesmo usuário, a partir do primeiro mês candidato, com
+    a descrição gerada ou a da série sem sufixo.
+    """
+    por_usuario = {}
+    for (usuario_id, _, (ano, mes)), descricao in candidatas.items():
+        limites = por_usuario.setdefault(usuario_id, [date(ano, mes, 1), set()])
+        limites[0] = min(limites[0], date(ano, mes, 1))
+        limites[1].update((descricao, re.sub(SUFIXO_RECORRENCIA, '', descricao)))
+
+    ocupadas = set()
+    for usuario_id, (inicio, descricoes) in por_usuario.items():
+        descricoes = sorted(descricoes)
+        for i in range(0, len(descricoes), TAMANHO_LOTE_VAGAS):
+            query = session.query(Transacao.usuario_id, Transacao.descricao, Transacao.data_pagamento).filter(
+                Transacao.recorrente == 1,
+                Transacao.usuario_id == usuario_id if usuario_id is not None else Transacao.usuario_id.is_(None),
+                Transacao.data_pagamento >= inicio,
+                Transacao.descricao.in_(descricoes[i:i + TAMANHO_LOTE_VAGAS])
+            )
+            ocupadas.update(_vaga_recorrencia(*linha) for linha in query)
+    return ocupadas & candidatas.keys()
+
+def _gerar_recorrencias(usuario_id, hoje):
+    """Grava as ocorrências mensais que ainda faltam até hoje; retorna quantas foram criadas"""
+    session = get_session()
+    if session is None:
+        return 0
+    
+    try:
+        novas_transacoes = 0
+        
+        # Buscar transações recorrentes
+        query = session.query(Transacao).filter(
+            Transacao.recorrente == 1,
+            (Transacao.status != 'Excluída') | (Transacao.status.is_(None))
+        )
+        
+        if usuario_id:
+            query = query.filter(Transacao.usuario_id == usuario_id)
+        
+        # Meses de cada série até hoje; depois, uma consulta só pelas vagas desses meses
+        pendentes = []
+        for transacao in query.all():
+            data_pagamento_original = transacao.data_pagamento
+            dia_fixo = transacao.dia_fixo
+            
+            if not dia_fixo:
+                dia_fixo = data_pagamento_original.day if data_pagamento_original else 1
+            
+            try:
+                meses_passados = (hoje.year - data_pagamento_original.year) * 12 + (hoje.month - data_pagamento_original.month)
+            except:
+                meses_passados = 0
+            
+            for meses in range(1, meses_passados + 1):
+                ano = data_pagamento_original.year + (data_pagamento_original.month + meses - 1) // 12
+                mes_num = (data_pagamento_original.month + meses - 1) % 12 + 1
+                
+                try:
+                    ultimo_dia_mes = calendar.monthrange(ano, mes_num)[1]
+                    dia = min(int(dia_fixo), ultimo_dia_mes)
+                    
+                    data_pagamento_virtual = date(ano, mes_num, dia)
+                except Exception as e:
+                    avisar_erro(f"Erro ao processar recorrência: {e}")
+                    continue
+                
+                if data_pagamento_virtual <= hoje and data_pagamento_virtual > data_pagamento_original:
+                    nova_descricao = f"{re.sub(SUFIXO_RECORRENCIA, '', transacao.descricao)} ({data_pagamento_virtual.strftime('%m/%Y')})"
+                    vaga = _vaga_recorrencia(transacao.usuario_id, nova_descricao, data_pagamento_virtual)
+                    pendentes.append((transacao, dia_fixo, data_pagamento_virtual, nova_descricao, vaga))
+        
+        # Verificar se a série já tem ocorrência no mês (gerada por qualquer ocorrência, ativa ou excluída)
+        ocupadas = _vagas_ocupadas(session, {vaga: descricao for _, _, _, descricao, vaga in pendentes})
+        
+        for transacao, dia_fixo, data_pagamento_virtual, nova_descricao, vaga in pendentes:
+            if vaga in ocupadas:
+                continue
+            
+            try:
+                if transacao.no_cartao:
+                    cartao = session.query(Cartao).filter_by(id=transacao.cartao_id).first() if transacao.cartao_id else None
+                    data_pagamento_final = calcular_ciclo_fatura(data_pagamento_virtual, *dias_do_cartao(cartao))[1]
+                else:
+                    data_pagamento_final = data_pagamento_virtual
+                
+                nova_transacao = Transacao(
+                    data_registro=hoje,
+                    data_pagamento=data_pagamento_final,
+                    pessoa=transacao.pessoa,
+                    categoria=transacao.categoria,
+                    tipo=transacao.tipo,
+                    valor=transacao.valor,
+                    descricao=nova_descricao,
+                    recorrente=1,
+                    dia_fixo=dia_fixo,
+                    pessoa_responsavel=transacao.pessoa_responsavel,
+                    no_cartao=transacao.no_cartao,
+                    investimento=transacao.investimento,
+                    vr=transacao.vr,
+                    forma_pagamento=transacao.forma_pagamento,
+                    parcelas=transacao.parcelas,
+                    parcela_atual=transacao.parcela_atual,
+                    status='Ativa',
+                    usuario_id=transacao.usuario_id,
+                    grupo=transacao.grupo if transacao.grupo else "padrao",
+                    grupo_id=transacao.grupo_id,
+                    compartilhado=transacao.compartilhado,
+                    cartao_id=transacao.cartao_id
+                )
+                
+                session.add(nova_transacao)
+                _atualizar_agregados(session, nova_transacao, 1)
+                ocupadas.add(vaga)
+                novas_transacoes += 1
+            except Exception as e:
+                avisar_erro(f"Erro ao processar recorrência: {e}")
+                continue
+        
+        session.commit()
+        if novas_transacoes:
+            marcar_dados_alterados()
+        return novas_transacoes
+    except Exception as e:
+        session.rollback()
+        avisar_erro(f"Erro ao processar recorrências: {e}")
+        return 0
+    finally:
+        session.close()
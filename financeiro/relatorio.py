@@ -0,0 +1,283 @@
+"""Relatório anual do Financeiro Familiar: totais por mês, categoria, forma de pagamento e
+usuário, com comparação com o ano anterior, exportados em XLSX e HTML.
+
+A agregação de cada (grupo, ano) roda em um pool de processos, cada um com
+a própria conexão ao banco; o processo principal só junta os resultados
+parciais e monta as tabelas. Assim o ADM gera os relatórios de todos os
+grupos de uma vez, e pelo app isso acontece em segundo plano.
+
+    python -m financeiro relatorio 2023 2024 --saida relatorios/
+"""
+import functools
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from html import escape
+from pathlib import Path
+
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
+
+from financeiro import dados
+from financeiro.carga_tardia import ModuloTardio
+from financeiro.modelos import Grupo, Transacao, Usuario
+
+pd = ModuloTardio('pandas')
+
+PROCESSOS_RELATORIO = int(os.environ.get('PROCESSOS_RELATORIO', min(4, os.cpu_count() or 1)))
+LIMITE_TAREFAS_GUARDADAS = 10
+DIMENSOES = ['mes', 'categoria', 'forma_pagamento', 'usuario']
+TITULOS_DIMENSOES = {'categoria': "Categoria", 'forma_pagamento': "Forma de pagamento", 'usuario': "Usuário"}
+NOMES_MESES = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+
+# ---------- Agregação (nos processos do pool) ----------
+def _iniciar_processo(url):
+    """Inicializador de cada processo do pool: só o engine, sem o restante de inicializar()"""
+    dados.engine = dados.create_sqlalchemy_engine(url)
+
+def agregar_ano(escopo, ano):
+    """Totais do escopo no ano por dimensão e tipo, somados no banco (inclui o ano arquivado, se houver).
+
+    Retorna {dimensao: [(valor, tipo, total), ...]} com tipos simples, para voltar ao processo principal.
+    """
+    session = dados.get_session()
+    if session is None:
+        raise RuntimeError("Erro de conexão com o banco")
+
+    try:
+        entidades = [Transacao]
+        if ano in dados.anos_arquivados(session):
+            entidades.append(aliased(Transacao, dados._tabela_ano(ano), adapt_on_names=True))
+
+        parciais = {dimensao: [] for dimensao in DIMENSOES}
+        for entidade in entidades:
+            filtros = [
+                dados.filtro_transacoes_ativas(entidade),
+                entidade.data_pagamento >= date(ano, 1, 1),
+                entidade.data_pagamento <= date(ano, 12, 31)
+            ]
+            condicao = dados.filtro_escopo(escopo, entidade)
+            if condicao is not None:
+                filtros.append(condicao)
+
+            colunas = {
+                'mes': dados._expressao_mes(entidade.data_pagamento),
+                'categoria': func.coalesce(entidade.categoria, 'Outros'),
+                'forma_pagamento': func.coalesce(entidade.forma_pagamento, '-'),
+                'usuario': func.coalesce(Usuario.username, '-')
+            }
+            for dimensao, coluna in colunas.items():
+                consulta = session.query(coluna, entidade.tipo, dados.soma_reais(entidade.valor_centavos)).filter(*filtros)
+                if dimensao == 'usuario':
+                    consulta = consulta.outerjoin(Usuario, entidade.usuario_id == Usuario.id)
+                parciais[dimensao] += [
+                    (valor, tipo, float(total or 0)) for valor, tipo, total in consulta.group_by(coluna, entidade.tipo)
+                ]
+        return parciais
+    finally:
+        session.close()
+
+# ---------- Junção e tabelas ----------
+def _variacao(atual, anterior):
+    """Variação percentual; vazia quando o ano anterior não tem valor"""
+    return ((atual - anterior) / anterior.abs() * 100).where(anterior != 0).round(1)
+
+def _tabela_dimensao(parciais, dimensao, anos):
+    """Linhas (tipo, valor da dimensão) x colunas por ano, com a variação de cada ano sobre o anterior"""
+    linhas = [(ano, valor, tipo, total) for ano, por_dimensao in parciais.items() for valor, tipo, total in por_dimensao[dimensao]]
+    df = pd.DataFrame(linhas, columns=['ano', dimensao, 'tipo', 'total'])
+    colunas_anos = sorted(parciais)
+    tabela = df.pivot_table(index=['tipo', dimensao], columns='ano', values='total', aggfunc='sum', fill_value=0.0)
+    tabela = tabela.reindex(columns=colunas_anos, fill_value=0.0)
+
+    resultado = pd.DataFrame(index=tabela.index)
+    for ano in anos:
+        resultado[str(ano)] = tabela[ano].round(2)
+        if ano - 1 in tabela.columns:
+            resultado[f"Δ% {ano}"] = _variacao(tabela[ano], tabela[ano - 1])
+    ultimo = str(anos[-1])
+    resultado = resultado[resultado[[str(ano) for ano in anos]].abs().sum(axis=1) > 0]
+    return resultado.sort_values(['tipo', ultimo], ascending=[False, False]).reset_index().rename(
+        columns={'tipo': "Tipo", dimensao: TITULOS_DIMENSOES[dimensao]}
+    )
+
+def _totais_mensais(parciais):
+    """Receitas, despesas e saldo de cada (ano, mês)"""
+    linhas = [(ano, valor, tipo, total) for ano, por_dimensao in parciais.items() for valor, tipo, total in por_dimensao['mes']]
+    df = pd.DataFrame(linhas, columns=['ano', 'mes', 'tipo', 'total'])
+    df['mes'] = df['mes'].str[5:7].astype(int)
+    tabela = df.pivot_table(index=['ano', 'mes'], columns='tipo', values='total', aggfunc='sum', fill_value=0.0)
+    indice = pd.MultiIndex.from_product([sorted(parciais), range(1, 13)], names=['ano', 'mes'])
+    tabela = tabela.reindex(indice, fill_value=0.0)
+    mensal = pd.DataFrame({
+        'receitas': tabela['Receita'] if 'Receita' in tabela else 0.0,
+        'despesas': tabela['Despesa'] if 'Despesa' in tabela else 0.0
+    }, index=indice)
+    mensal['saldo'] = mensal['receitas'] - mensal['despesas']
+    return mensal
+
+def montar_relatorio(parciais, anos):
+    """Tabelas do relatório a partir das agregações por ano (parciais inclui o ano anterior ao primeiro)"""
+    anos = sorted(anos)
+    mensal = _totais_mensais(parciais)
+
+    anuais = mensal.groupby(level='ano').sum()
+    resumo = pd.DataFrame({
+        'Ano': anos,
+        'Receitas': [anuais.at[ano, 'receitas'] for ano in anos],
+        'Despesas': [anuais.at[ano, 'despesas'] for ano in anos],
+        'Saldo': [anuais.at[ano, 'saldo'] for ano in anos]
+    })
+    anteriores = anuais.reindex([ano - 1 for ano in anos])
+    resumo['Δ% Receitas'] = _variacao(resumo['Receitas'], pd.Series(anteriores['receitas'].to_numpy()))
+    resumo['Δ% Despesas'] = _variacao(resumo['Despesas'], pd.Series(anteriores['despesas'].to_numpy()))
+
+    por_mes = mensal.loc[anos].reset_index()
+    anterior = mensal.reindex(pd.MultiIndex.from_arrays([por_mes['ano'] - 1, por_mes['mes']]))
+    por_mes['Δ% Despesas'] = _variacao(por_mes['despesas'], pd.Series(anterior['despesas'].to_numpy()))
+    por_mes['mes'] = por_mes['mes'].map(lambda m: NOMES_MESES[m - 1])
+    por_mes = por_mes.rename(columns={'ano': "Ano", 'mes': "Mês", 'receitas': "Receitas", 'despesas': "Despesas", 'saldo': "Saldo"})
+
+    return {
+        "Resumo": resumo.round(2),
+        "Mensal": por_mes.round(2),
+        "Categorias": _tabela_dimensao(parciais, 'categoria', anos),
+        "Formas de pagamento": _tabela_dimensao(parciais, 'forma_pagamento', anos),
+        "Usuários": _tabela_dimensao(parciais, 'usuario', anos)
+    }
+
+# ---------- Exportação ----------
+def exportar_xlsx(tabelas, caminho):
+    with pd.ExcelWriter(caminho, engine='openpyxl') as planilha:
+        for nome, tabela in tabelas.items():
+            tabela.to_excel(planilha, sheet_name=nome[:31], index=False)
+
+ESTILO_HTML = """
+body { font-family: system-ui, sans-serif; margin: 2rem; color: #222; }
+h1 { font-size: 1.5rem; } h2 { font-size: 1.15rem; margin-top: 2rem; }
+table { border-collapse: collapse; font-size: 0.9rem; }
+th, td { border: 1px solid #ddd; padding: 0.3rem 0.6rem; text-align: right; }
+th { background: #f3f3f3; } td:first-child, td:nth-child(2) { text-align: left; }
+"""
+
+def exportar_html(tabelas, titulo, caminho):
+    """Página HTML autônoma (sem scripts nem arquivos externos) com as tabelas do relatório"""
+    secoes = [
+        f"<h2>{escape(nome)}</h2>\n" + tabela.to_html(index=False, na_rep="", float_format=lambda v: f"{v:,.2f}", border=0)
+        for nome, tabela in tabelas.items()
+    ]
+    gerado = datetime.now().strftime('%d/%m/%Y %H:%M')
+    Path(caminho).write_text(
+        f"<!DOCTYPE html>\n<html lang=\"pt-BR\"><head><meta charset=\"utf-8\"><title>{escape(titulo)}</title>"
+        f"<style>{ESTILO_HTML}</style></head>\n<body><h1>{escape(titulo)}</h1><p>Gerado em {gerado}</p>\n"
+        + "\n".join(secoes) + "\n</body></html>\n",
+        encoding='utf-8'
+    )
+
+# ---------- Geração ----------
+def listar_grupos():
+    session = dados.get_session(leitura=True)
+    if session is None:
+        return []
+    try:
+        return [nome for (nome,) in session.query(Grupo.nome).order_by(Grupo.nome)]
+    finally:
+        session.close()
+
+def _nome_arquivo(texto):
+    return "".join(c if c.isalnum() or c in '-_' else '_' for c in texto)
+
+def gerar_relatorios(anos, grupos=None, pasta='.', processos=None, progresso=None):
+    """Gera XLSX e HTML de cada grupo (None = todos) nos anos pedidos; retorna os caminhos gerados.
+
+    Cada (grupo, ano), mais o ano anterior ao primeiro para a comparação,
+    é agregado em um processo do pool. progresso(concluidas, total) é
+    chamado a cada agregação terminada.
+    """
+    anos = sorted(set(anos))
+    grupos = grupos or listar_grupos()
+    tarefas = [(('grupo', grupo), ano) for grupo in grupos for ano in [anos[0] - 1] + anos]
+    if not tarefas:
+        return []
+
+    parciais = defaultdict(dict)
+    url = dados.engine.url.render_as_string(hide_password=False)
+    # spawn: processos novos, sem herdar threads e conexões do app
+    with ProcessPoolExecutor(max_workers=min(processos or PROCESSOS_RELATORIO, len(tarefas)),
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_iniciar_processo, initargs=(url,)) as pool:
+        futuros = {pool.submit(agregar_ano, escopo, ano): (escopo, ano) for escopo, ano in tarefas}
+        for concluidas, futuro in enumerate(as_completed(futuros), start=1):
+            escopo, ano = futuros[futuro]
+            parciais[escopo[1]][ano] = futuro.result()
+            if progresso is not None:
+                progresso(concluidas, len(tarefas))
+
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    periodo = f"{anos[0]}-{anos[-1]}" if len(anos) > 1 else str(anos[0])
+    arquivos = []
+    for grupo in grupos:
+        tabelas = montar_relatorio(parciais[grupo], anos)
+        base = pasta / f"relatorio_{_nome_arquivo(grupo)}_{periodo}"
+        exportar_xlsx(tabelas, base.with_suffix('.xlsx'))
+        exportar_html(tabelas, f"Relatório anual {periodo} – grupo {grupo}", base.with_suffix('.html'))
+        arquivos += [base.with_suffix('.xlsx'), base.with_suffix('.html')]
+    dados.registrar_log(dados.logging.INFO, "Relatórios anuais gerados", grupos=len(grupos), anos=anos,
+                        agregacoes=len(tarefas))
+    return arquivos
+
+# ---------- Execução em segundo plano (app) ----------
+@functools.lru_cache(maxsize=None)
+def _tarefas():
+    """Gerações de relatório iniciadas neste processo"""
+    return {'trava': threading.Lock(), 'proxima': 1, 'tarefas': {}}
+
+def _executar_tarefa(tarefa_id, anos, grupos, pasta, registro, metricas):
+    tarefa = registro['tarefas'][tarefa_id]
+
+    def progresso(concluidas, total):
+        with registro['trava']:
+            tarefa.update(concluidas=concluidas, total=total)
+
+    with dados.em_contexto({'metricas': metricas}):
+        try:
+            arquivos = gerar_relatorios(anos, grupos, pasta, progresso=progresso)
+            with registro['trava']:
+                tarefa.update(status='concluída', arquivos=[str(a) for a in arquivos], concluido_em=datetime.now())
+        except Exception as e:
+            with registro['trava']:
+                tarefa.update(status='erro', erro=str(e))
+            dados.registrar_log(dados.logging.ERROR, "Erro ao gerar relatórios anuais", erro=str(e))
+
+def agendar_relatorios(anos, grupos=None):
+    """Inicia a geração em segundo plano, sem prender a sessão; retorna o id da tarefa"""
+    registro = _tarefas()
+    pasta = tempfile.mkdtemp(prefix='relatorios_')
+    with registro['trava']:
+        tarefa_id = registro['proxima']
+        registro['proxima'] += 1
+        registro['tarefas'][tarefa_id] = {
+            'status': 'executando', 'anos': sorted(anos), 'grupos': grupos, 'concluidas': 0, 'total': 0,
+            'arquivos': [], 'iniciado_em': datetime.now()
+        }
+        for antiga in sorted(registro['tarefas'])[:-LIMITE_TAREFAS_GUARDADAS]:
+            del registro['tarefas'][antiga]
+
+    threading.Thread(
+        target=_executar_tarefa,
+        args=(tarefa_id, anos, grupos, pasta, registro, dados.metricas_processo()),
+        name=f"relatorio-{tarefa_id}",
+        daemon=True
+    ).start()
+    return tarefa_id
+
+def situacao_relatorios():
+    """Tarefas de relatório deste processo, da mais recente para a mais antiga"""
+    registro = _tarefas()
+    with registro['trava']:
+        return [dict(id=tarefa_id, **tarefa) for tarefa_id, tarefa in sorted(registro['tarefas'].items(), reverse=True)]
@@ -0,0 +1,51 @@
+"""Banco SQLite temporário para os testes do núcleo (financeiro.dados lê o ambiente ao ser importado)."""
+import itertools
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_PASTA = Path(tempfile.mkdtemp(prefix='financeiro_testes_'))
+os.environ['DATABASE_URL'] = f"sqlite:///{_PASTA / 'financeiro.db'}"
+os.environ['INTERVALO_VERIFICACAO_VERSAO_S'] = '0'
+os.environ['INTERVALO_VERIFICACAO_CONFIG_S'] = '0'
+os.environ.pop('DATABASE_READ_URL', None)
+os.environ.pop('CACHE_COMPARTILHADO', None)
+
+_numeros = itertools.count(1)
+
+from sqlalchemy import delete, inspect  # noqa: E402
+
+from financeiro import dados  # noqa: E402
+from financeiro.modelos import (  # noqa: E402
+    Transacao, transacoes_excluidas, Compactacao, AnoArquivado, SaldoArquivado, GastoMensal, Fatura, Configuracao
+)
+
+@pytest.fixture(scope='session')
+def banco():
+    # Nada é escrito na pasta do repositório
+    dados.EXCEL_APOIO = _PASTA / 'planilha_apoio.xlsx'
+    dados.CONFIG_FILE = _PASTA / 'config.json'
+    dados.inicializar()
+    return dados
+
+@pytest.fixture
+def limpo(banco):
+    """Banco sem transações, arquivos de anos ou compactações a cada teste"""
+    with banco.engine.begin() as conn:
+        for tabela in inspect(conn).get_table_names():
+            if tabela.startswith('transacoes_') and tabela[-4:].isdigit():
+                conn.exec_driver_sql(f"DROP TABLE {tabela}")
+        for modelo in (Transacao, transacoes_excluidas, Compactacao, AnoArquivado, SaldoArquivado,
+                       GastoMensal, Fatura, Configuracao):
+            conn.execute(delete(modelo))
+    banco.marcar_dados_alterados()
+    return banco
+
+@pytest.fixture
+def usuario(limpo):
+    """Id de um usuário comum novo"""
+    sucesso, mensagem, novo_id = limpo.auth.criar_usuario(f"teste{next(_numeros)}", "Senha123")
+    assert sucesso, mensagem
+    return novo_id
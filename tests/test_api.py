@@ -0,0 +1,72 @@
+import asyncio
+import json
+from datetime import date
+
+import pytest
+from starlette.requests import Request
+
+from financeiro import api
+
+def _chamar(endpoint, token=None, metodo='GET', corpo=None, consulta=''):
+    """Executa o endpoint com uma requisição montada à mão; retorna (status, JSON)"""
+    cabecalhos = [(b'authorization', f"Bearer {token}".encode())] if token else []
+    conteudo = json.dumps(corpo).encode() if corpo is not None else b''
+
+    async def receber():
+        return {'type': 'http.request', 'body': conteudo, 'more_body': False}
+
+    requisicao = Request({'type': 'http', 'method': metodo, 'path': '/api', 'headers': cabecalhos,
+                          'query_string': consulta.encode()}, receber)
+    resposta = asyncio.run(endpoint(requisicao))
+    return resposta.status_code, json.loads(resposta.body)
+
+@pytest.fixture
+def token(limpo, usuario, monkeypatch):
+    monkeypatch.setattr(api, '_tokens', {})
+    sucesso, mensagem, valor = limpo.auth.criar_token_api(usuario, "testes")
+    assert sucesso, mensagem
+    return valor
+
+def test_sem_token_ou_token_invalido(token):
+    assert _chamar(api.listar)[0] == 401
+    assert _chamar(api.listar, "nao-existe")[0] == 401
+
+def test_lista_apenas_o_escopo_do_dono_do_token(limpo, usuario, token):
+    outro = limpo.auth.criar_usuario("alheio", "Senha123")[2]
+    limpo.inserir_transacao('Despesa', date(2025, 2, 1), date(2025, 2, 1), "Mercado", 80.0, "Mercado", "Pix", None, usuario)
+    limpo.inserir_transacao('Despesa', date(2025, 2, 1), date(2025, 2, 1), "Oficina", 300.0, "Transporte", "Pix", None, outro)
+
+    status, conteudo = _chamar(api.listar, token)
+    assert status == 200
+    assert [t['descricao'] for t in conteudo['transacoes']] == ["Mercado"]
+
+def test_inserir_grava_para_o_dono_do_token(limpo, usuario, token):
+    corpo = {'tipo': 'Despesa', 'valor': 42.5, 'descricao': "Farmácia", 'categoria': "Saúde",
+             'forma_pagamento': "Pix", 'data_pagamento': '2025-02-03'}
+    status, conteudo = _chamar(api.inserir, token, 'POST', corpo)
+    assert status == 201, conteudo
+
+    assert list(limpo.carregar_transacoes(usuario)['descricao']) == ["Farmácia"]
+    assert _chamar(api.inserir, token, 'POST', corpo)[0] == 409  # mesma impressão: possível duplicada
+
+def test_token_revogado_deixa_de_valer(limpo, usuario, token, monkeypatch):
+    assert _chamar(api.listar, token)[0] == 200
+    (registro,) = limpo.auth.listar_tokens_api(usuario)
+    assert limpo.auth.revogar_token_api(registro['id'], usuario)[0]
+
+    monkeypatch.setattr(api, '_tokens', {})  # sem esperar o cache curto de tokens expirar
+    assert _chamar(api.listar, token)[0] == 401
+
+def test_cartao_de_outro_usuario_e_recusado(limpo, usuario, token):
+    outro = limpo.auth.criar_usuario("dono_do_cartao", "Senha123")[2]
+    assert limpo.salvar_cartao(outro, "Cartão alheio", 5, 15)[0]
+    assert limpo.inserir_transacao('Despesa', date(2025, 2, 1), date(2025, 2, 15), "Posto", 200.0, "Transporte", "Crédito",
+                                   {"no_cartao": 1}, outro)
+    (cartao_alheio,) = limpo.listar_cartoes(outro)
+    (fatura_alheia,) = limpo.listar_faturas(outro)
+
+    corpo = {'tipo': 'Despesa', 'valor': 999.0, 'descricao': "Eletrônicos", 'categoria': "Outros",
+             'forma_pagamento': "Crédito", 'data_compra': '2025-02-01', 'cartao_id': cartao_alheio['id']}
+    assert _chamar(api.inserir, token, 'POST', corpo)[0] == 404
+    assert limpo.listar_faturas(outro)[0]['total'] == fatura_alheia['total'] == 200.0
+    assert limpo.carregar_transacoes(usuario).empty
@@ -0,0 +1,91 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import insert, inspect, select
+
+from financeiro.modelos import Transacao
+
+@pytest.fixture
+def historico(limpo, usuario):
+    """Dois anos encerrados do mesmo usuário, com uma excluída em 2023"""
+    for data, tipo, descricao, valor in [
+        (date(2023, 3, 10), 'Receita', "Salário", 5000.0),
+        (date(2023, 3, 15), 'Despesa', "Mercado", 812.35),
+        (date(2023, 11, 2), 'Despesa', "Farmácia", 45.9),
+        (date(2024, 2, 1), 'Despesa', "Aluguel", 1500.0),
+    ]:
+        assert limpo.inserir_transacao(tipo, data, data, descricao, valor, "Outros", "Pix", None, usuario)
+    farmacia = limpo.carregar_transacoes(usuario).query("descricao == 'Farmácia'")['id'].iloc[0]
+    assert limpo.excluir_transacao(int(farmacia))
+    return usuario
+
+def _linhas(dados):
+    session = dados.get_session()
+    try:
+        return sorted((t.data_pagamento, t.descricao, t.valor_centavos, t.status) for t in session.query(Transacao))
+    finally:
+        session.close()
+
+def _saldo(dados, usuario_id):
+    session = dados.get_session()
+    try:
+        escopo = dados.escopo_usuario(session, usuario_id)
+        return dados.saldo_arquivado(session, escopo)
+    finally:
+        session.close()
+
+def test_arquivar_e_restaurar_devolve_as_mesmas_linhas(limpo, historico):
+    antes = _linhas(limpo)
+
+    sucesso, mensagem = limpo.arquivar_ano(2023)
+    assert sucesso, mensagem
+    assert [linha[0].year for linha in _linhas(limpo)] == [2024]
+    assert 'transacoes_2023' in inspect(limpo.engine).get_table_names()
+
+    sucesso, mensagem = limpo.restaurar_ano(2023)
+    assert sucesso, mensagem
+    assert _linhas(limpo) == antes
+    assert 'transacoes_2023' not in inspect(limpo.engine).get_table_names()
+    assert _saldo(limpo, historico) == 0.0
+
+def test_ano_arquivado_continua_visivel(limpo, historico):
+    limpo.arquivar_ano(2023)
+
+    # Só as ativas entram no saldo guardado; a excluída vai junto para o arquivo
+    assert _saldo(limpo, historico) == pytest.approx(5000.0 - 812.35)
+    assert 2023 in limpo.anos_com_transacoes(historico)
+    arquivadas = limpo.carregar_transacoes(historico, date(2023, 1, 1), date(2023, 12, 31))
+    assert sorted(arquivadas['descricao']) == ["Mercado", "Salário"]
+    assert arquivadas['valor'].sum() == pytest.approx(5812.35)
+
+def test_arquivamento_respeita_a_ordem_dos_anos(limpo, historico):
+    assert not limpo.arquivar_ano(2024)[0]
+    assert not limpo.arquivar_ano(date.today().year)[0]
+
+    assert limpo.arquivar_ano(2023)[0]
+    assert limpo.arquivar_ano(2024)[0]
+    assert not limpo.restaurar_ano(2023)[0]
+    assert limpo.restaurar_ano(2024)[0]
+    assert limpo.restaurar_ano(2023)[0]
+    assert not limpo.restaurar_ano(2023)[0]
+
+def test_serie_mensal_atravessa_o_ano_arquivado(limpo, historico):
+    periodos = [(date(2023, 1, 1), date(2024, 3, 31)), (date(2023, 6, 1), date(2024, 3, 31)), (date(2024, 1, 1), date(2024, 3, 31))]
+    antes = [limpo.carregar_serie_mensal(historico, inicio, fim) for inicio, fim in periodos]
+    resumos = [limpo.resumo_mensal(historico, *mes) for mes in ((2023, 3), (2023, 12), (2024, 2))]
+
+    assert limpo.arquivar_ano(2023)[0]
+    for (inicio, fim), (mensal, categorias) in zip(periodos, antes):
+        arquivado, categorias_arquivado = limpo.carregar_serie_mensal(historico, inicio, fim)
+        pd.testing.assert_frame_equal(arquivado, mensal)
+        pd.testing.assert_frame_equal(categorias_arquivado, categorias)
+    assert [limpo.resumo_mensal(historico, *mes) for mes in ((2023, 3), (2023, 12), (2024, 2))] == resumos
+    assert antes[0][0]['saldo_acumulado'].iloc[-1] == pytest.approx(5000.0 - 812.35 - 1500.0)
+
+def test_linhas_sem_data_de_pagamento_recebem_a_data_de_registro(limpo, usuario):
+    with limpo.engine.begin() as conn:
+        conn.execute(insert(Transacao).values(tipo='Despesa', data_registro=date(2024, 5, 2), descricao="Legado",
+                                              valor=10.0, valor_centavos=1000, usuario_id=usuario, status='Ativa'))
+        assert limpo._preencher_data_pagamento(conn) == 1
+        assert conn.execute(select(Transacao.data_pagamento)).scalar() == date(2024, 5, 2)
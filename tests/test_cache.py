@@ -0,0 +1,96 @@
+import logging
+import shutil
+import sqlite3
+from datetime import date
+from pathlib import Path
+
+import pytest
+from sqlalchemy import delete
+
+from financeiro import dados
+from financeiro.dados import CacheSQLite
+from financeiro.modelos import Transacao
+from financeiro.recorrencia import projetar_fluxo_caixa
+
+def test_cache_sqlite_e_visto_por_outra_instancia(tmp_path):
+    arquivo = str(tmp_path / 'cache.db')
+    primeiro, segundo = CacheSQLite('livros', 2, arquivo), CacheSQLite('livros', 2, arquivo)
+
+    primeiro.guardar(('familia', 1), {'linhas': 10})
+    assert segundo.obter(('familia', 1)) == {'linhas': 10}
+
+    segundo.descartar(lambda chave: chave[1] != 1)
+    assert primeiro.obter(('familia', 1)) is None
+
+def test_cache_sqlite_respeita_o_limite(tmp_path):
+    cache = CacheSQLite('projecoes', 2, str(tmp_path / 'cache.db'))
+    for versao in range(3):
+        cache.guardar(('familia', versao), versao)
+    assert sorted(chave for chave, _ in cache.itens()) == [('familia', 1), ('familia', 2)]
+
+def test_falha_do_cache_sqlite_nao_interrompe(tmp_path, monkeypatch):
+    cache = CacheSQLite('livros', 2, str(tmp_path / 'cache.db'))
+    avisos = []
+    monkeypatch.setattr(dados, 'registrar_log', lambda nivel, mensagem, **campos: avisos.append((nivel, mensagem)))
+
+    def indisponivel():
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(cache, '_conexao', indisponivel)
+
+    cache.guardar(('familia', 1), {'linhas': 10})
+    assert cache.obter(('familia', 1)) is None
+    cache.limpar()
+    assert [nivel for nivel, _ in avisos] == [logging.WARNING] * 3
+
+def test_escrita_de_outra_instancia_muda_a_versao(limpo):
+    versao = limpo.versao_dados()
+    limpo._incrementar_contador('dados')  # o que marcar_dados_alterados faz em outro processo
+    assert limpo.versao_dados() > versao
+
+def test_livro_em_cache_acompanha_as_escritas(limpo, usuario):
+    limpo.inserir_transacao('Despesa', date(2025, 1, 3), date(2025, 1, 3), "Mercado", 100.0, "Mercado", "Pix", None, usuario)
+    assert len(limpo.carregar_transacoes(usuario)) == 1
+
+    limpo.inserir_transacao('Despesa', date(2025, 1, 4), date(2025, 1, 4), "Padaria", 12.5, "Mercado", "Pix", None, usuario)
+    assert len(limpo.carregar_transacoes(usuario)) == 2
+
+@pytest.fixture
+def replica(limpo, monkeypatch):
+    """Tira uma cópia somente leitura do banco no instante da chamada e a usa como réplica de leitura"""
+    copia = Path(limpo.engine.url.database).with_name('replica.db')
+    engines = []
+
+    def copiar():
+        shutil.copy(limpo.engine.url.database, copia)
+        engines.append(limpo.create_sqlalchemy_engine(f"sqlite:///file:{copia}?mode=ro&uri=true", 'leitura'))
+        monkeypatch.setattr(limpo, 'engine_leitura', engines[-1])
+        # As escritas anteriores foram de outra sessão: esta não está na janela em que as leituras vão ao primário
+        monkeypatch.setattr(limpo._coleta, 'ultima_escrita', 0)
+
+    yield copiar
+    for replica_engine in engines:
+        replica_engine.dispose()
+    copia.unlink(missing_ok=True)
+
+def test_livro_em_cache_nao_vem_de_replica_atrasada(limpo, usuario, replica):
+    replica()
+    limpo.inserir_transacao('Despesa', date(2025, 1, 3), date(2025, 1, 3), "Mercado", 100.0, "Mercado", "Pix", None, usuario)
+    limpo._coleta.ultima_escrita = 0
+
+    assert len(limpo.carregar_transacoes(usuario)) == 1
+
+def test_projecao_nao_vem_de_replica_atrasada(limpo, usuario, replica):
+    replica()
+    limpo.inserir_transacao('Receita', date(2025, 1, 3), date(2025, 1, 3), "Salário", 3000.0, "Salario", "Pix", None, usuario)
+    limpo._coleta.ultima_escrita = 0
+
+    assert projetar_fluxo_caixa(usuario, meses=3)[1] == 3000.0
+
+def test_replica_em_dia_atende_o_livro(limpo, usuario, replica):
+    limpo.inserir_transacao('Despesa', date(2025, 1, 3), date(2025, 1, 3), "Mercado", 100.0, "Mercado", "Pix", None, usuario)
+    replica()
+    # Removida só no primário e sem mudar a versão: a linha que aparece veio da réplica
+    with limpo.engine.begin() as conn:
+        conn.execute(delete(Transacao))
+
+    assert list(limpo.carregar_transacoes(usuario)['descricao']) == ["Mercado"]
@@ -0,0 +1,48 @@
+from datetime import date
+
+import pytest
+
+from financeiro.dados import Categorizador
+
+@pytest.fixture
+def categorizadores(limpo, monkeypatch):
+    """Sem categorizadores em cache de outros testes (o escopo do grupo padrão é compartilhado)"""
+    monkeypatch.setitem(limpo._estado_processo(), 'categorizadores', {})
+    return limpo
+
+def test_sugere_pela_descricao_palavra_e_prefixo():
+    categorizador = Categorizador()
+    for descricao, categoria, forma in [("Supermercado Extra", "Mercado", "Crédito"), ("Mercado da esquina", "Mercado", "Pix"),
+                                        ("Uber centro", "Transporte", "Crédito"), ("Uber Eats (03/2025)", "Alimentação", "Crédito"),
+                                        ("Uber Eats", "Alimentação", "Crédito")]:
+        categorizador.aprender(descricao, categoria, forma)
+
+    assert categorizador.sugerir("uber eats")['categoria'] == "Alimentação"           # descrição já vista
+    assert categorizador.sugerir("Mercado Central")['forma'] == "Pix"                 # pela palavra
+    assert categorizador.sugerir("Superm")['categoria'] == "Mercado"                  # digitação incompleta
+    desconhecida = categorizador.sugerir("Cinema")
+    assert (desconhecida['categoria'], desconhecida['confianca_categoria']) == ("Mercado", 0.0)
+
+    categorizador.aprender("Uber Eats (03/2025)", "Alimentação", "Crédito", peso=-1)
+    categorizador.aprender("Uber Eats", "Alimentação", "Crédito", peso=-1)
+    assert categorizador.sugerir("Uber")['categoria'] == "Transporte"
+
+def test_categorizador_em_cache_acompanha_as_escritas(categorizadores, usuario):
+    dados = categorizadores
+    for descricao in ("Uber centro", "Uber aeroporto"):
+        dados.inserir_transacao('Despesa', date(2025, 3, 2), date(2025, 3, 2), descricao, 30.0, "Transporte", "Crédito",
+                                None, usuario)
+    assert dados.sugerir_categoria("Uber", usuario)['categoria'] == "Transporte"
+
+    ids = dados.carregar_transacoes(usuario)['id']
+    for transacao_id in ids:
+        dados.editar_transacao(int(transacao_id), {"categoria": "Lazer", "forma_pagamento": "Pix"})
+    dados.inserir_transacao('Despesa', date(2025, 3, 3), date(2025, 3, 3), "Farmácia", 20.0, "Saúde", "Pix", None, usuario)
+    dados.excluir_transacao(int(ids.iloc[0]))
+    descricoes = ["Uber", "Uber centro", "Uber aeroporto", "Farm"]
+    incrementais = dados.sugerir_em_lote(descricoes, usuario)
+    assert [s['categoria'] for s in incrementais] == ["Lazer", "Lazer", "Lazer", "Saúde"]
+
+    # Treinar do zero no histórico dá as mesmas sugestões
+    dados._estado_processo()['categorizadores'].clear()
+    assert dados.sugerir_em_lote(descricoes, usuario) == incrementais
@@ -0,0 +1,62 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from financeiro.dados import centavos, dividir_centavos
+from financeiro.modelos import Fatura, GastoMensal
+
+@pytest.mark.parametrize('valor, esperado', [
+    (10, 1000),
+    (0.1, 10),
+    (2.675, 268),        # em float seria 267.49999...; a conversão parte do texto
+    (0.125, 13),         # meio centavo arredonda para cima
+    (-0.125, -13),
+    ("19.99", 1999),
+    (Decimal("1234.565"), 123457),
+    (None, 0),
+    (float('nan'), 0),
+])
+def test_centavos(valor, esperado):
+    assert centavos(valor) == esperado
+
+@pytest.mark.parametrize('total, partes, esperado', [
+    (1000, 3, [334, 333, 333]),
+    (1001, 4, [251, 250, 250, 250]),
+    (1200, 12, [100] * 12),
+    (1, 3, [1, 0, 0]),
+])
+def test_dividir_centavos_soma_o_total(total, partes, esperado):
+    assert dividir_centavos(total, partes) == esperado
+    assert sum(dividir_centavos(total, partes)) == total
+
+def test_totais_do_mes_sao_exatos(limpo, usuario):
+    for valor in (0.1, 0.2, 0.3) * 10:
+        limpo.inserir_transacao('Despesa', date(2025, 3, 4), date(2025, 3, 4), "Café", valor, "Alimentação", "Pix", None, usuario)
+    limpo.inserir_transacao('Receita', date(2025, 3, 5), date(2025, 3, 5), "Salário", 6.0, "Salario", "Pix", None, usuario)
+
+    resumo = limpo.resumo_mensal(usuario, 2025, 3)
+    assert resumo['despesas'] == 6.0
+    assert resumo['saldo'] == 0.0
+
+def test_totais_gravados_sao_centavos_exatos(limpo, usuario):
+    limpo.salvar_cartao(usuario, "Principal", 25, 5, padrao=True)
+    for valor in (0.1, 0.2, 0.3) * 10:
+        limpo.inserir_transacao('Despesa', date(2025, 3, 4), date(2025, 4, 5), "Café", valor, "Alimentação", "Crédito",
+                                {"no_cartao": 1}, usuario)
+    assert limpo.salvar_orcamento(('usuario', usuario), "Alimentação", "1234.565")[0]
+
+    assert [f['total'] for f in limpo.listar_faturas(usuario)] == [6.0]
+    assert limpo.gastos_do_mes(('usuario', usuario), '2025-04') == {"Alimentação": 6.0}
+    (orcamento,) = limpo.situacao_orcamentos(usuario, '2025-04')
+    assert (orcamento['limite'], orcamento['gasto']) == (1234.57, 6.0)
+
+    # Recalcular do zero dá os mesmos centavos que as somas incrementais
+    with limpo.engine.begin() as conn:
+        incrementais = [conn.execute(select(GastoMensal.total_centavos)).scalar(), conn.execute(select(Fatura.total_centavos)).scalar()]
+        limpo.reconstruir_gastos_mensais(conn)
+    limpo.reconstruir_faturas(somente_pendentes=False)
+    with limpo.engine.connect() as conn:
+        recalculados = [conn.execute(select(GastoMensal.total_centavos)).scalar(), conn.execute(select(Fatura.total_centavos)).scalar()]
+    assert incrementais == recalculados == [600, 600]
@@ -0,0 +1,65 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from financeiro.modelos import Transacao, transacoes_excluidas
+
+@pytest.fixture
+def excluidas(limpo, usuario):
+    """Uma ativa, uma excluída há 100 dias e uma excluída agora"""
+    for descricao in ("Mercado", "Cinema", "Padaria"):
+        assert limpo.inserir_transacao('Despesa', date(2025, 5, 2), date(2025, 5, 2), descricao, 30.0, "Outros", "Pix",
+                                       None, usuario)
+    livro = limpo.carregar_transacoes(usuario)
+    ids = dict(zip(livro['descricao'], livro['id']))
+    limpo.excluir_transacao(int(ids["Cinema"]))
+    limpo.excluir_transacao(int(ids["Padaria"]))
+    with limpo.engine.begin() as conn:
+        conn.execute(update(Transacao).where(Transacao.id == int(ids["Cinema"])).values(
+            data_exclusao=datetime.utcnow() - timedelta(days=100)
+        ))
+    return usuario
+
+def _principal(dados):
+    with dados.engine.connect() as conn:
+        return sorted(conn.execute(select(Transacao.descricao, Transacao.status)).all())
+
+def _arquivo(dados):
+    with dados.engine.connect() as conn:
+        return [descricao for (descricao,) in conn.execute(select(transacoes_excluidas.c.descricao))]
+
+def test_compactar_e_desfazer_devolve_as_excluidas(limpo, excluidas):
+    antes = _principal(limpo)
+
+    sucesso, mensagem, relatorio = limpo.compactar_excluidas(dias_retencao=90)
+    assert sucesso, mensagem
+    assert relatorio['movidas'] == 1
+    assert _arquivo(limpo) == ["Cinema"]
+    assert ("Cinema", 'Excluída') not in _principal(limpo)
+
+    sucesso, mensagem = limpo.desfazer_compactacao(relatorio['id'])
+    assert sucesso, mensagem
+    assert _principal(limpo) == antes
+    assert _arquivo(limpo) == []
+    assert not limpo.desfazer_compactacao(relatorio['id'])[0]
+    assert limpo.listar_compactacoes()[0]['desfeita']
+
+def test_compactacao_nao_muda_o_que_aparece(limpo, excluidas):
+    visiveis = limpo.carregar_transacoes(excluidas)[['descricao', 'valor']].to_dict('records')
+    limpo.compactar_excluidas(dias_retencao=0)
+    assert limpo.carregar_transacoes(excluidas)[['descricao', 'valor']].to_dict('records') == visiveis
+
+def test_expurgo_encerra_a_janela_de_desfazer(limpo, excluidas):
+    _, _, relatorio = limpo.compactar_excluidas(dias_retencao=90)
+    with limpo.engine.begin() as conn:
+        conn.execute(update(transacoes_excluidas).values(
+            compactado_em=datetime.utcnow() - timedelta(days=limpo.DIAS_DESFAZER_COMPACTACAO + 1)
+        ))
+
+    _, _, seguinte = limpo.compactar_excluidas(dias_retencao=90)
+    assert seguinte['expurgadas'] == 1
+    assert _arquivo(limpo) == []
+    sucesso, mensagem = limpo.desfazer_compactacao(relatorio['id'])
+    assert not sucesso
+    assert "janela" in mensagem
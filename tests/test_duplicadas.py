@@ -0,0 +1,48 @@
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import insert, select
+
+from financeiro.dados import impressao_transacao
+from financeiro.modelos import Transacao
+
+def test_impressao_ignora_caixa_acentos_e_sufixos():
+    base = impressao_transacao(7, date(2025, 3, 4), 19.99, "Farmácia São João", "Pix")
+    assert impressao_transacao(7, "2025-03-04", "19.99", "farmacia sao  joao (03/2025)", "pix") == base
+    assert impressao_transacao(7, date(2025, 3, 4), 19.98, "Farmácia São João", "Pix") != base
+    assert impressao_transacao(8, date(2025, 3, 4), 19.99, "Farmácia São João", "Pix") != base
+    assert impressao_transacao(7, date(2025, 3, 5), 19.99, "Farmácia São João", "Pix") != base
+
+def test_duplicadas_acompanham_edicao_e_exclusao(limpo, usuario):
+    limpo.inserir_transacao('Despesa', date(2025, 3, 4), date(2025, 3, 4), "Farmácia", 19.99, "Saúde", "Pix", None, usuario)
+    (transacao_id,) = limpo.carregar_transacoes(usuario)['id']
+    antes = impressao_transacao(usuario, date(2025, 3, 4), 19.99, "farmacia", "Pix")
+    assert [t['id'] for t in limpo.transacoes_duplicadas([antes])[antes]] == [transacao_id]
+
+    limpo.editar_transacao(int(transacao_id), {"valor": 25.0})
+    depois = impressao_transacao(usuario, date(2025, 3, 4), 25.0, "Farmácia", "Pix")
+    assert list(limpo.transacoes_duplicadas([antes, depois])) == [depois]
+
+    limpo.excluir_transacao(int(transacao_id))
+    assert limpo.transacoes_duplicadas([depois]) == {}
+
+def test_linhas_antigas_recebem_impressao(limpo, usuario):
+    with limpo.engine.begin() as conn:
+        conn.execute(insert(Transacao).values(tipo='Despesa', data_pagamento=date(2024, 5, 2), descricao="Padaria",
+                                              valor=12.5, forma_pagamento="Pix", usuario_id=usuario, status='Ativa'))
+    with limpo.engine.connect() as conn:
+        assert limpo.preencher_impressoes(conn, tamanho_lote=1) == 1
+        assert conn.execute(select(Transacao.impressao)).scalar() == impressao_transacao(
+            usuario, date(2024, 5, 2), 12.5, "Padaria", "Pix"
+        )
+
+def test_reimportar_extrato_desmarca_as_linhas_registradas(limpo, usuario):
+    limpo.inserir_transacao('Despesa', date(2025, 3, 4), date(2025, 3, 4), "Mercado", 80.0, "Mercado", "Pix", None, usuario)
+    extrato = pd.DataFrame({
+        'data': [date(2025, 3, 4), date(2025, 3, 4)],
+        'descricao': ["MERCADO", "Mercado"],
+        'valor': [80.0, 81.0],
+        'categoria': ["Mercado", "Mercado"],
+        'forma': [None, "Pix"],
+    })
+    assert list(limpo.preparar_extrato(extrato, usuario)['importar']) == [False, True]
@@ -0,0 +1,64 @@
+from datetime import date
+
+from sqlalchemy import update
+
+from financeiro.modelos import Transacao
+
+def test_compra_com_cartao_alheio_nao_soma_na_fatura_de_outro(limpo, usuario):
+    outro = limpo.auth.criar_usuario("vizinho_cartao", "Senha123")[2]
+    limpo.salvar_cartao(outro, "Cartão do vizinho", 5, 15)
+    limpo.inserir_transacao('Despesa', date(2025, 2, 1), date(2025, 2, 15), "Posto", 200.0, "Transporte", "Crédito",
+                            {"no_cartao": 1}, outro)
+    (cartao_alheio,) = limpo.listar_cartoes(outro)
+
+    limpo.inserir_transacao('Despesa', date(2025, 2, 1), date(2025, 2, 15), "Eletrônicos", 999.0, "Outros", "Crédito",
+                            {"no_cartao": 1, "cartao_id": cartao_alheio['id']}, usuario)
+    assert [f['total'] for f in limpo.listar_faturas(outro)] == [200.0]
+
+def _totais_gravados(dados, usuario_id):
+    faturas = {(f['data_vencimento'], f['total']) for f in dados.listar_faturas(usuario_id) if f['total']}
+    escopo = ('usuario', usuario_id)
+    gastos = {mes: dados.gastos_do_mes(escopo, mes) for mes in ('2025-03', '2025-04', '2025-05')}
+    return faturas, {mes: {c: v for c, v in por_categoria.items() if v} for mes, por_categoria in gastos.items()}
+
+def _totais_recalculados(dados, usuario_id):
+    """Os mesmos totais somados a partir das transações ativas"""
+    livro = dados.carregar_transacoes(usuario_id)
+    cartao = livro[livro['no_cartao'] == 1]
+    faturas = {(d.date(), round(v, 2)) for d, v in cartao.groupby('data_pagamento')['valor'].sum().items()}
+    gastos = {mes: {} for mes in ('2025-03', '2025-04', '2025-05')}
+    for (mes, categoria), valor in livro.groupby([livro['data_pagamento'].dt.strftime('%Y-%m'), 'categoria'])['valor'].sum().items():
+        gastos[mes][categoria] = round(valor, 2)
+    return faturas, gastos
+
+def test_totais_acompanham_inclusao_edicao_e_exclusao(limpo, usuario):
+    limpo.salvar_cartao(usuario, "Principal", 25, 5, padrao=True)
+    compras = [("Mercado", 150.1, "Mercado"), ("Posto", 200.2, "Transporte"), ("Livros", 80.3, "Educação")]
+    for descricao, valor, categoria in compras:
+        limpo.inserir_transacao('Despesa', date(2025, 3, 10), date(2025, 4, 5), descricao, valor, categoria, "Crédito",
+                                {"no_cartao": 1}, usuario)
+    ids = dict(zip(*[limpo.carregar_transacoes(usuario)[c] for c in ('descricao', 'id')]))
+    assert _totais_gravados(limpo, usuario) == _totais_recalculados(limpo, usuario)
+
+    limpo.editar_transacao(int(ids["Mercado"]), {"valor": 99.99, "categoria": "Alimentação"})
+    limpo.editar_transacao(int(ids["Posto"]), {"data_pagamento": date(2025, 5, 5)})
+    assert _totais_gravados(limpo, usuario) == _totais_recalculados(limpo, usuario)
+
+    # Outro cartão passa a ser o padrão e o fechamento muda: a exclusão sai da fatura onde a compra entrou
+    limpo.salvar_cartao(usuario, "Novo", 10, 20, padrao=True)
+    limpo.excluir_transacao(int(ids["Livros"]))
+    limpo.excluir_transacao(int(ids["Posto"]))
+    assert _totais_gravados(limpo, usuario) == _totais_recalculados(limpo, usuario)
+    assert [(f['cartao'], f['total']) for f in limpo.listar_faturas(usuario) if f['total']] == [("Principal", 99.99)]
+
+def test_exclusao_sai_da_fatura_gravada(limpo, usuario):
+    limpo.salvar_cartao(usuario, "Principal", 25, 5, padrao=True)
+    limpo.inserir_transacao('Despesa', date(2025, 3, 10), date(2025, 4, 5), "Mercado", 150.0, "Mercado", "Crédito",
+                            {"no_cartao": 1}, usuario)
+    (compra,) = limpo.carregar_transacoes(usuario)['id']
+    # Data corrigida direto no banco (ex.: ajuste manual): a compra continua somada na fatura de abril
+    with limpo.engine.begin() as conn:
+        conn.execute(update(Transacao).where(Transacao.id == int(compra)).values(data_pagamento=date(2025, 5, 5)))
+
+    limpo.excluir_transacao(int(compra))
+    assert [(f['data_vencimento'], f['total']) for f in limpo.listar_faturas(usuario)] == [(date(2025, 4, 5), 0.0)]
@@ -0,0 +1,49 @@
+import itertools
+import random
+from datetime import date, timedelta
+
+import pytest
+
+@pytest.fixture
+def livro(limpo, usuario):
+    """Transações espalhadas por três anos, com registro e pagamento em datas diferentes"""
+    sorteio = random.Random(49)
+    for _ in range(80):
+        registro = date(2023, 1, 1) + timedelta(days=sorteio.randrange(3 * 365))
+        pagamento = registro + timedelta(days=sorteio.choice([0, 0, 12, 40]))
+        tipo = sorteio.choice(['Despesa', 'Despesa', 'Receita'])
+        assert limpo.inserir_transacao(tipo, registro, pagamento, f"Item {sorteio.randrange(1000)}",
+                                       round(sorteio.uniform(5, 900), 2), sorteio.choice(["Mercado", "Saúde", "Lazer"]),
+                                       sorteio.choice(["Pix", "Crédito", "Boleto"]), None, usuario)
+    return usuario
+
+def _forca_bruta(df, coluna_data, mes, ano, **valores):
+    mascara = df['id'].notna()
+    if mes is not None:
+        mascara &= df[coluna_data].dt.month == mes
+    if ano is not None:
+        mascara &= df[coluna_data].dt.year == ano
+    for coluna, valor in valores.items():
+        if valor is not None:
+            mascara &= df[coluna] == valor
+    return sorted(df.loc[mascara, 'id'])
+
+def test_indice_da_o_mesmo_que_filtrar_o_livro(limpo, livro):
+    completo = limpo.carregar_transacoes(livro)
+    combinacoes = itertools.product(
+        ['data_pagamento', 'data_registro'], [None, 1, 12], [None, 2023, 2025], [None, 'Receita'], [None, "Crédito"],
+        [None, "Mercado", "Inexistente"]
+    )
+    for coluna_data, mes, ano, tipo, forma, categoria in combinacoes:
+        filtros = {'tipo': tipo, 'forma_pagamento': forma, 'categoria': categoria}
+        filtrado = limpo.filtrar_transacoes(livro, coluna_data=coluna_data, mes=mes, ano=ano, **filtros)
+        ids = sorted(filtrado['id']) if not filtrado.empty else []
+        assert ids == _forca_bruta(completo, coluna_data, mes, ano, **filtros), (coluna_data, mes, ano, filtros)
+
+def test_ids_seguem_a_ordem_informada(limpo, livro):
+    completo = limpo.carregar_transacoes(livro)
+    despesas = set(completo.loc[completo['tipo'] == 'Despesa', 'id'])
+    ordem = [int(i) for i in completo['id'].sample(frac=1, random_state=49)] + [10 ** 9]
+
+    filtrado = limpo.filtrar_transacoes(livro, ids=ordem, tipo='Despesa')
+    assert list(filtrado['id']) == [i for i in ordem if i in despesas]
@@ -0,0 +1,49 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from financeiro.modelos import GastoMensal
+from financeiro.recorrencia import _gerar_recorrencias
+
+def _contadores(dados):
+    with dados.engine.connect() as conn:
+        linhas = conn.execute(select(
+            GastoMensal.ano_mes, GastoMensal.categoria, GastoMensal.usuario_id, GastoMensal.grupo, GastoMensal.total_centavos
+        )).all()
+    return sorted(linha for linha in linhas if linha[-1])
+
+def test_contadores_acompanham_as_escritas(limpo, usuario):
+    for descricao, valor, categoria in [("Mercado", 412.3, "Mercado"), ("Posto", 250.0, "Transporte"),
+                                        ("Farmácia", 89.9, "Saúde"), ("Padaria", 23.45, "Mercado")]:
+        limpo.inserir_transacao('Despesa', date(2025, 3, 8), date(2025, 3, 8), descricao, valor, categoria, "Pix", None, usuario)
+    limpo.inserir_transacao('Receita', date(2025, 3, 5), date(2025, 3, 5), "Salário", 5000.0, "Salario", "Pix", None, usuario)
+    limpo.inserir_transacao('Despesa', date(2025, 1, 10), date(2025, 1, 10), "Internet", 120.0, "Moradia", "Pix",
+                            {"recorrente": 1, "dia_fixo": 10}, usuario)
+    assert _gerar_recorrencias(usuario, date(2025, 3, 20)) == 2
+
+    ids = dict(zip(*[limpo.carregar_transacoes(usuario)[c] for c in ('descricao', 'id')]))
+    limpo.editar_transacao(int(ids["Mercado"]), {"valor": 398.75, "categoria": "Alimentação"})
+    limpo.editar_transacao(int(ids["Posto"]), {"data_pagamento": date(2025, 4, 2)})
+    limpo.excluir_transacao(int(ids["Farmácia"]))
+
+    incrementais = _contadores(limpo)
+    with limpo.engine.begin() as conn:
+        limpo.reconstruir_gastos_mensais(conn)
+    assert incrementais == _contadores(limpo)
+    assert limpo.gastos_do_mes(('usuario', usuario), '2025-03') == {"Alimentação": 398.75, "Mercado": 23.45, "Moradia": 120.0}
+
+def test_alertas_seguem_o_gasto_do_mes(limpo, usuario):
+    assert limpo.salvar_orcamento(('usuario', usuario), "Mercado", 1000, alerta_percentual=80)[0]
+
+    def situacao():
+        (orcamento,) = limpo.situacao_orcamentos(usuario, '2025-03')
+        return orcamento['gasto'], orcamento['alerta']
+
+    assert situacao() == (0.0, 'ok')
+    for valor, esperado in [(700.0, (700.0, 'ok')), (150.0, (850.0, 'atencao')), (200.0, (1050.0, 'estourado'))]:
+        limpo.inserir_transacao('Despesa', date(2025, 3, 8), date(2025, 3, 8), "Mercado", valor, "Mercado", "Pix", None, usuario)
+        assert situacao() == esperado
+
+    ultima = limpo.carregar_transacoes(usuario).query("valor == 200")['id'].iloc[0]
+    limpo.excluir_transacao(int(ultima))
+    assert situacao() == (850.0, 'atencao')
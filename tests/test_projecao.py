@@ -0,0 +1,48 @@
+from datetime import date
+
+import pandas as pd
+
+from financeiro import recorrencia
+from financeiro.datas import somar_meses
+from financeiro.recorrencia import expandir_recorrencias, projetar_fluxo_caixa
+
+def test_expansao_segue_o_dia_fixo_e_o_fim_do_mes():
+    recorrentes = pd.DataFrame([
+        {'usuario_id': 1, 'tipo': 'Despesa', 'descricao': "Aluguel", 'valor': 1500.0, 'dia_fixo': 31,
+         'no_cartao': 0, 'data_pagamento': date(2025, 1, 31)},
+        # A última ocorrência gravada da série é a de março: a expansão continua dela
+        {'usuario_id': 1, 'tipo': 'Despesa', 'descricao': "Streaming (03/2025)", 'valor': 39.9, 'dia_fixo': 3,
+         'no_cartao': 1, 'data_pagamento': date(2025, 4, 10)},
+        {'usuario_id': 1, 'tipo': 'Despesa', 'descricao': "Streaming", 'valor': 39.9, 'dia_fixo': 3,
+         'no_cartao': 1, 'data_pagamento': date(2025, 2, 10)},
+    ])
+
+    ocorrencias = expandir_recorrencias(recorrentes, date(2025, 2, 10), date(2025, 5, 31))
+    assert sorted(zip(ocorrencias['data_pagamento'].dt.date, ocorrencias['valor'])) == [
+        (date(2025, 2, 28), 1500.0), (date(2025, 3, 31), 1500.0), (date(2025, 4, 30), 1500.0),
+        (date(2025, 5, 10), 39.9), (date(2025, 5, 31), 1500.0)
+    ]
+
+def test_projecao_nao_grava_e_acompanha_a_versao(limpo, usuario, monkeypatch):
+    hoje = date.today()
+    proximo = date(*somar_meses(hoje.year, hoje.month, 1), 1)
+    limpo.inserir_transacao('Receita', hoje, hoje, "Salário", 3000.0, "Salario", "Pix",
+                            {"recorrente": 1, "dia_fixo": hoje.day}, usuario)
+    expansoes = []
+    monkeypatch.setattr(recorrencia, 'expandir_recorrencias',
+                        lambda *args: expansoes.append(args) or expandir_recorrencias(*args))
+
+    projecao, saldo_atual = projetar_fluxo_caixa(usuario, meses=3)
+    assert saldo_atual == 3000.0
+    assert list(projecao['receitas']) == [0.0, 3000.0, 3000.0]
+    assert list(projecao['saldo_previsto']) == [3000.0, 6000.0, 9000.0]
+    assert len(limpo.carregar_transacoes(usuario)) == 1
+
+    projetar_fluxo_caixa(usuario, meses=3)
+    assert len(expansoes) == 1  # mesma versão: vem do cache
+
+    limpo.inserir_transacao('Despesa', hoje, proximo, "Parcela da geladeira", 500.0, "Casa", "Boleto", None, usuario)
+    projecao, _ = projetar_fluxo_caixa(usuario, meses=3)
+    assert len(expansoes) == 2
+    assert list(projecao['despesas']) == [0.0, 500.0, 0.0]
+    assert list(projecao['saldo_previsto']) == [3000.0, 5500.0, 8500.0]
@@ -0,0 +1,96 @@
+from datetime import date
+
+import pytest
+
+from financeiro.modelos import Transacao
+from financeiro import recorrencia
+from financeiro.recorrencia import _gerar_recorrencias
+
+HOJE = date(2025, 6, 20)
+
+@pytest.fixture
+def aluguel(usuario, limpo):
+    """Recorrência mensal lançada em janeiro; até HOJE faltam fevereiro a junho"""
+    assert limpo.inserir_transacao('Despesa', date(2025, 1, 5), date(2025, 1, 5), "Aluguel", 1500.0, "Moradia", "Pix",
+                                   {"recorrente": 1, "dia_fixo": 5}, usuario)
+    return usuario
+
+def _ocorrencias(dados, usuario_id):
+    session = dados.get_session()
+    try:
+        return session.query(Transacao).filter_by(usuario_id=usuario_id).order_by(Transacao.data_pagamento).all()
+    finally:
+        session.close()
+
+def _do_mes(dados, usuario_id, competencia):
+    return [t for t in _ocorrencias(dados, usuario_id) if t.descricao.endswith(f"({competencia})")]
+
+def test_gera_os_meses_que_faltam_uma_vez(limpo, aluguel):
+    assert _gerar_recorrencias(aluguel, HOJE) == 5
+    assert _gerar_recorrencias(aluguel, HOJE) == 0
+
+    ocorrencias = _ocorrencias(limpo, aluguel)
+    assert [t.data_pagamento for t in ocorrencias[1:]] == [date(2025, m, 5) for m in range(2, 7)]
+    assert ocorrencias[-1].descricao == "Aluguel (06/2025)"
+
+def test_ocorrencia_excluida_nao_volta(limpo, aluguel):
+    _gerar_recorrencias(aluguel, HOJE)
+    (marco,) = _do_mes(limpo, aluguel, "03/2025")
+    assert limpo.excluir_transacao(marco.id)
+
+    assert _gerar_recorrencias(aluguel, HOJE) == 0
+    assert [t.status for t in _do_mes(limpo, aluguel, "03/2025")] == ['Excluída']
+
+def test_ocorrencia_editada_nao_duplica(limpo, aluguel):
+    _gerar_recorrencias(aluguel, HOJE)
+    (abril,) = _do_mes(limpo, aluguel, "04/2025")
+    sucesso, _ = limpo.editar_transacao(abril.id, {"valor": 1650.0, "forma_pagamento": "Boleto"})
+    assert sucesso
+
+    assert _gerar_recorrencias(aluguel, HOJE) == 0
+    assert [t.valor for t in _do_mes(limpo, aluguel, "04/2025")] == [1650.0]
+
+def test_mudar_vencimento_da_fatura_nao_regera(limpo, usuario):
+    assert limpo.inserir_transacao('Despesa', date(2025, 1, 3), date(2025, 1, 3), "Streaming", 39.9, "Streaming", "Crédito",
+                                   {"recorrente": 1, "dia_fixo": 3, "no_cartao": 1}, usuario)
+    assert _gerar_recorrencias(usuario, HOJE) == 5
+
+    sucesso, _ = limpo.save_config({"dia_fatura": 25})
+    assert sucesso
+    assert _gerar_recorrencias(usuario, HOJE) == 0
+    assert len(_ocorrencias(limpo, usuario)) == 6
+
+def test_excluida_continua_valendo_depois_da_compactacao(limpo, aluguel):
+    _gerar_recorrencias(aluguel, HOJE)
+    (maio,) = _do_mes(limpo, aluguel, "05/2025")
+    limpo.excluir_transacao(maio.id)
+
+    sucesso, _, relatorio = limpo.compactar_excluidas(dias_retencao=0)
+    assert sucesso
+    assert relatorio['movidas'] == 0
+    assert _gerar_recorrencias(aluguel, HOJE) == 0
+    assert len(_do_mes(limpo, aluguel, "05/2025")) == 1
+
+def test_series_de_usuarios_diferentes_sao_independentes(limpo, aluguel):
+    outro = limpo.auth.criar_usuario("vizinho", "Senha123")[2]
+    limpo.inserir_transacao('Despesa', date(2025, 4, 5), date(2025, 4, 5), "Aluguel", 900.0, "Moradia", "Pix",
+                            {"recorrente": 1, "dia_fixo": 5}, outro)
+
+    assert _gerar_recorrencias(None, HOJE) == 5 + 2
+    assert [t.descricao for t in _ocorrencias(limpo, outro)] == ["Aluguel", "Aluguel (05/2025)", "Aluguel (06/2025)"]
+
+def test_lancamento_da_serie_sem_sufixo_ocupa_o_mes(limpo, aluguel):
+    limpo.inserir_transacao('Despesa', date(2025, 4, 5), date(2025, 4, 5), "Aluguel", 1500.0, "Moradia", "Pix",
+                            {"recorrente": 1, "dia_fixo": 5}, aluguel)
+
+    assert _gerar_recorrencias(aluguel, HOJE) == 4
+    assert [t.descricao for t in _ocorrencias(limpo, aluguel) if t.data_pagamento == date(2025, 4, 5)] == ["Aluguel"]
+
+def test_vagas_consultadas_em_lotes(limpo, aluguel, monkeypatch):
+    monkeypatch.setattr(recorrencia, 'TAMANHO_LOTE_VAGAS', 1)
+    _gerar_recorrencias(aluguel, HOJE)
+    (marco,) = _do_mes(limpo, aluguel, "03/2025")
+    limpo.excluir_transacao(marco.id)
+
+    assert _gerar_recorrencias(aluguel, HOJE) == 0
+    assert len(_ocorrencias(limpo, aluguel)) == 6